@@ -0,0 +1,314 @@
+"""
+Herramientas de línea de comandos de la API de películas
+    build-index: preprocesa un catálogo y escribe sus artefactos versionados
+    load-test: prueba de carga HTTP con presupuestos de latencia
+Ejemplo: python -m herramientas build-index --input DataSet/netflix_titles.csv --out artifacts/
+Ejemplo: python -m herramientas load-test --config carga.json
+"""
+
+# argparse / json / os / sys: Subcomandos, configuración y código de salida
+import argparse
+import json
+import os
+import sys
+
+# asyncio / random / socket / subprocess / time: Prueba de carga contra una instancia local de la API
+import asyncio
+import random
+import socket
+import subprocess
+import time
+
+# Path: Manejo de rutas de archivos independiente del sistema operativo
+from pathlib import Path
+
+# numpy: Percentiles de latencia
+import numpy as np
+
+# main: Módulo de la API (se importa una sola vez; sus clases se serializan
+# como main.ColumnaTexto, main.ListaPostings, etc. en los artefactos)
+import main
+
+# ========================================
+# PRUEBA DE CARGA HTTP CON PRESUPUESTOS DE LATENCIA (load-test)
+# ========================================
+
+# Configuración versionada de la mezcla de tráfico y de los presupuestos de latencia
+RUTA_CONFIG_CARGA = Path(__file__).resolve().parent / 'carga.json'
+
+# Códigos con los que el control de admisión rechaza trabajo (no son fallos del servidor)
+ESTADOS_RECHAZO = (429, 503)
+
+def percentiles_latencia(latencias):
+    """
+    Calcula los percentiles de latencia de un grupo de solicitudes
+    Parámetros: latencias - Lista de latencias en segundos
+    Retorna: Diccionario con p50, p95, p99 y máximo en milisegundos
+    """
+    if not latencias:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    valores = np.array(latencias) * 1000
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(valores.max()), 2),
+    }
+
+def puerto_libre():
+    """
+    Retorna: Un puerto TCP libre en la interfaz local
+    """
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+def iniciar_servidor(puerto, espera_maxima=120.0):
+    """
+    Arranca la API con uvicorn en un subproceso y espera a que esté lista (/health/ready)
+    Parámetros:
+        puerto - Puerto local donde escuchará
+        espera_maxima - Segundos máximos de arranque (incluye la carga del catálogo)
+    Retorna: Tupla (proceso, url base)
+    """
+    import httpx
+
+    url = f"http://127.0.0.1:{puerto}"
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(puerto), '--log-level', 'warning'],
+        cwd=Path(__file__).resolve().parent, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + espera_maxima
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {proceso.returncode})")
+        try:
+            if httpx.get(url + '/health/ready', timeout=1.0).status_code == 200:
+                return proceso, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError(f"El servidor no respondió en {espera_maxima:.0f} s")
+
+async def generar_carga(url, config):
+    """
+    Reproduce la mezcla de tráfico a la tasa objetivo (lazo abierto: las
+    solicitudes salen a su hora aunque las anteriores no hayan terminado)
+    Parámetros:
+        url - URL base de la API
+        config - Configuración de carga (ver carga.json)
+    Retorna: Reporte con solicitudes, errores, rechazos y percentiles por grupo y en total
+    """
+    import httpx
+
+    aleatorio = random.Random(config.get('semilla', 0))
+    mezcla = config['mezcla']
+    pesos = [grupo['peso'] for grupo in mezcla]
+    tasa = float(config['tasa_por_segundo'])
+    total = int(tasa * float(config['duracion_segundos']))
+    resultados = {grupo['nombre']: {'latencias': [], 'solicitudes': 0, 'errores': 0, 'rechazadas': 0}
+                  for grupo in mezcla}
+
+    limites = httpx.Limits(max_connections=config.get('concurrencia_maxima', 64))
+    async with httpx.AsyncClient(base_url=url, limits=limites,
+                                 timeout=config.get('timeout_segundos', 30)) as cliente:
+        async def enviar(nombre, ruta, programado):
+            resultado = resultados[nombre]
+            resultado['solicitudes'] += 1
+            try:
+                estado = (await cliente.get(ruta)).status_code
+            except httpx.HTTPError:
+                estado = None
+            # La latencia se mide desde la hora programada, no desde el envío:
+            # si el cliente se atrasa, ese atraso también cuenta
+            if estado in ESTADOS_RECHAZO:
+                resultado['rechazadas'] += 1
+            elif estado is None or estado >= 500:
+                resultado['errores'] += 1
+            else:
+                resultado['latencias'].append(time.perf_counter() - programado)
+
+        tareas = []
+        inicio = time.perf_counter()
+        for n in range(total):
+            programado = inicio + n / tasa
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            grupo = aleatorio.choices(mezcla, pesos)[0]
+            tareas.append(asyncio.create_task(enviar(grupo['nombre'], aleatorio.choice(grupo['rutas']), programado)))
+        await asyncio.gather(*tareas)
+        transcurrido = time.perf_counter() - inicio
+
+    reporte = {}
+    for nombre, resultado in resultados.items():
+        reporte[nombre] = resumen_grupo(resultado, transcurrido)
+    reporte['total'] = resumen_grupo({
+        'latencias': [l for r in resultados.values() for l in r['latencias']],
+        'solicitudes': sum(r['solicitudes'] for r in resultados.values()),
+        'errores': sum(r['errores'] for r in resultados.values()),
+        'rechazadas': sum(r['rechazadas'] for r in resultados.values()),
+    }, transcurrido)
+    return reporte
+
+def resumen_grupo(resultado, transcurrido):
+    """
+    Resume las solicitudes de un grupo: tasas, rendimiento y percentiles
+    """
+    solicitudes = resultado['solicitudes']
+    return {
+        "solicitudes": solicitudes,
+        "completadas": len(resultado['latencias']),
+        "errores": resultado['errores'],
+        "rechazadas": resultado['rechazadas'],
+        "tasa_errores": round(resultado['errores'] / solicitudes, 4) if solicitudes else 0.0,
+        "tasa_rechazos": round(resultado['rechazadas'] / solicitudes, 4) if solicitudes else 0.0,
+        "rendimiento_rps": round(len(resultado['latencias']) / transcurrido, 2) if transcurrido else 0.0,
+        **percentiles_latencia(resultado['latencias']),
+    }
+
+def verificar_presupuestos(reporte, presupuestos):
+    """
+    Compara el reporte con los presupuestos de la configuración
+    Parámetros:
+        reporte - Reporte devuelto por generar_carga
+        presupuestos - Diccionario grupo -> {p50_ms, p95_ms, p99_ms, tasa_errores,
+                       tasa_rechazos, rendimiento_min_rps}
+    Retorna: Lista de incumplimientos (vacía si todo está dentro del presupuesto)
+    """
+    incumplimientos = []
+    for nombre, limites in presupuestos.items():
+        medido = reporte.get(nombre)
+        if medido is None:
+            incumplimientos.append(f"{nombre}: el grupo no existe en la mezcla")
+            continue
+        for metrica, limite in limites.items():
+            if metrica == 'rendimiento_min_rps':
+                if medido['rendimiento_rps'] < limite:
+                    incumplimientos.append(f"{nombre}: {medido['rendimiento_rps']} rps < {limite} rps")
+                continue
+            valor = medido.get(metrica)
+            if valor is None:
+                incumplimientos.append(f"{nombre}: sin solicitudes completadas para medir {metrica}")
+            elif valor > limite:
+                incumplimientos.append(f"{nombre}: {metrica} = {valor} > {limite}")
+    return incumplimientos
+
+def ejecutar_prueba_carga(config, url=None):
+    """
+    Ejecuta la prueba de carga contra url o, si no se indica, contra una
+    instancia local de la API arrancada para la prueba
+    Retorna: Tupla (reporte, incumplimientos)
+    """
+    proceso = None
+    if url is None:
+        proceso, url = iniciar_servidor(puerto_libre())
+    try:
+        # Calentamiento: la primera solicitud de cada ruta no cuenta en los percentiles
+        if config.get('calentamiento', True):
+            asyncio.run(generar_carga(url, {**config, 'duracion_segundos': 1,
+                                            'tasa_por_segundo': min(float(config['tasa_por_segundo']), 20)}))
+        reporte = asyncio.run(generar_carga(url, config))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+    return reporte, verificar_presupuestos(reporte, config.get('presupuestos', {}))
+
+# ========================================
+# LÍNEA DE COMANDOS
+# ========================================
+
+def comando_build_index(argumentos):
+    """
+    Subcomando build-index: construye y publica los artefactos de un catálogo
+    Retorna: Código de salida del proceso
+    """
+    try:
+        manifiesto = main.construir_artefactos(argumentos.input, argumentos.out, argumentos.catalogo,
+                                          max(argumentos.procesos, 1))
+    except Exception as e:
+        print(f"❌ Error al construir los artefactos: {e}")
+        return 1
+
+    print(f"✅ Artefacto v{manifiesto['version']} de '{manifiesto['catalogo']}' escrito: "
+          f"{manifiesto['archivo']['nombre']} ({manifiesto['archivo']['bytes'] / 1e6:.1f} MB)")
+    for etapa, segundos in manifiesto['tiempos_segundos'].items():
+        print(f"   {etapa}: {segundos:.3f} s")
+    return 0
+
+def comando_load_test(argumentos):
+    """
+    Subcomando load-test: reproduce la mezcla de tráfico y falla si se
+    supera algún presupuesto de latencia
+    Retorna: Código de salida del proceso (1 si hay incumplimientos)
+    """
+    try:
+        with open(argumentos.config, encoding='utf-8') as archivo:
+            config = json.load(archivo)
+        if argumentos.tasa is not None:
+            config['tasa_por_segundo'] = argumentos.tasa
+        if argumentos.duracion is not None:
+            config['duracion_segundos'] = argumentos.duracion
+        print(f"🚀 Prueba de carga: {config['tasa_por_segundo']} solicitudes/s durante "
+              f"{config['duracion_segundos']} s contra {argumentos.url or 'una instancia local'}")
+        reporte, incumplimientos = ejecutar_prueba_carga(config, argumentos.url)
+    except ImportError as e:
+        print(f"❌ La prueba de carga necesita httpx y uvicorn: {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ Error en la prueba de carga: {e}")
+        return 1
+
+    print(f"{'grupo':<12} {'solic.':>7} {'err.':>5} {'rech.':>5} {'rps':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nombre, medido in reporte.items():
+        print(f"{nombre:<12} {medido['solicitudes']:>7} {medido['errores']:>5} {medido['rechazadas']:>5} "
+              f"{medido['rendimiento_rps']:>8} {str(medido['p50_ms']):>9} {str(medido['p95_ms']):>9} "
+              f"{str(medido['p99_ms']):>9}")
+    if argumentos.reporte:
+        Path(argumentos.reporte).write_text(
+            json.dumps({"reporte": reporte, "incumplimientos": incumplimientos}, indent=2, ensure_ascii=False),
+            encoding='utf-8'
+        )
+
+    if incumplimientos:
+        print("❌ Presupuestos de latencia superados:")
+        for incumplimiento in incumplimientos:
+            print(f"   {incumplimiento}")
+        return 1
+    print("✅ Todos los presupuestos de latencia se cumplen")
+    return 0
+
+def ejecutar_linea_de_comandos(argumentos=None):
+    """
+    Punto de entrada de la línea de comandos
+    Ejemplo: python -m herramientas build-index --input DataSet/netflix_titles.csv --out artifacts/
+    Ejemplo: python -m herramientas load-test --config carga.json
+    Retorna: Código de salida del proceso
+    """
+    analizador = argparse.ArgumentParser(prog='python -m herramientas', description="Herramientas de la API de películas")
+    subcomandos = analizador.add_subparsers(dest='comando', required=True)
+
+    construir = subcomandos.add_parser('build-index', help="Preprocesa un catálogo y escribe sus artefactos")
+    construir.add_argument('--input', default=main.RUTA_DATASET, help="CSV del catálogo")
+    construir.add_argument('--out', default=str(main.DIRECTORIO_ARTEFACTOS), help="Carpeta de artefactos")
+    construir.add_argument('--catalogo', default=main.CATALOGO_POR_DEFECTO, help="Identificador del catálogo")
+    construir.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help="Procesos a usar")
+    construir.set_defaults(funcion=comando_build_index)
+
+    carga = subcomandos.add_parser('load-test', help="Prueba de carga HTTP con presupuestos de latencia")
+    carga.add_argument('--config', default=str(RUTA_CONFIG_CARGA), help="Mezcla de tráfico y presupuestos")
+    carga.add_argument('--url', default=None, help="API ya en marcha (por defecto se arranca una local)")
+    carga.add_argument('--tasa', type=float, default=None, help="Solicitudes por segundo (reemplaza la config)")
+    carga.add_argument('--duracion', type=float, default=None, help="Segundos de prueba (reemplaza la config)")
+    carga.add_argument('--reporte', default=None, help="Archivo JSON donde guardar el reporte")
+    carga.set_defaults(funcion=comando_load_test)
+
+    argumentos = analizador.parse_args(argumentos)
+    return argumentos.funcion(argumentos)
+
+if __name__ == "__main__":
+    sys.exit(ejecutar_linea_de_comandos())
@@ -2,11 +2,65 @@
 
 # FastAPI: Framework web moderno y rápido para crear APIs con Python
 # HTTPException: Para manejar y lanzar excepciones HTTP personalizadas
-from fastapi import FastAPI, HTTPException
+# Depends: Para reutilizar los parámetros de filtros en varias rutas
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 
 # HTMLResponse: Para devolver respuestas en formato HTML
 # JSONResponse: Para devolver respuestas en formato JSON
-from fastapi.responses import HTMLResponse, JSONResponse
+# StreamingResponse: Para enviar los resultados del chatbot por Server-Sent Events
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+# run_in_threadpool: Ejecuta el trabajo costoso fuera del bucle de eventos
+from fastapi.concurrency import run_in_threadpool
+
+# re: Expresiones regulares para el análisis de consultas
+import re
+
+# json / lru_cache: Persistencia de la tabla de lemas y memoria de lemas nuevos
+import json
+from functools import lru_cache
+
+# base64: Cursores opacos de paginación
+import base64
+
+# asyncio / math / os / time: Control de admisión y configuración por variables de entorno
+import asyncio
+import math
+import os
+import sys
+import time
+
+# gzip / hashlib: Compresión y huellas digitales de los recursos estáticos
+import gzip
+import hashlib
+
+# Counter / deque / OrderedDict: Conteos, colas de espera y caché LRU
+from collections import Counter, OrderedDict, deque
+
+# array: Arreglos compactos de enteros para las listas de los índices
+from array import array
+
+# threading / Future / ProcessPoolExecutor: Candados, cargas compartidas y construcción en varios núcleos
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+
+# pickle / io / gc: Artefactos precalculados (se construyen con: python -m herramientas build-index)
+import gc
+import io
+import pickle
+
+# Path: Manejo de rutas de archivos independiente del sistema operativo
+from pathlib import Path
+
+# date / List / Optional: Tipos para los parámetros de filtros por rango y del lote de ids
+from datetime import date
+from typing import List, Optional
+
+# BaseModel: Cuerpo JSON de la consulta de películas por lote
+from pydantic import BaseModel
+
+# numpy: Arreglos ordenados y búsqueda binaria para los filtros por rango
+import numpy as np
 
 # pandas: Biblioteca para manipulación y análisis de datos estructurados
 import pandas as pd
@@ -20,6 +74,9 @@ from nltk.tokenize import word_tokenize
 # wordnet: Base de datos léxica para obtener sinónimos, antónimos y relaciones semánticas
 from nltk.corpus import wordnet
 
+# SnowballStemmer: Reduce las palabras a su raíz (killers -> killer) sin datos descargados
+from nltk.stem.snowball import SnowballStemmer
+
 # Configuración de la ruta donde NLTK buscará los datos descargados
 nltk.data.path.append('C:/Users/jhonm/AppData/Roaming/nltk_data')
 
@@ -63,20 +120,21 @@ app = FastAPI(
 # ETAPA 4: CARGA DEL DATASET
 # ========================================
 
-# Variable global para el dataset
-dataset_netflix = None
+# Ruta del dataset por defecto (relativa a la carpeta del proyecto)
+RUTA_DATASET = 'DataSet/netflix_titles.csv'
 
-def cargar_dataset():
+def cargar_dataset(ruta=RUTA_DATASET):
     """
-    Carga el archivo netflix_titles.csv con pandas
+    Carga el archivo netflix_titles.csv (u otro catálogo con las mismas columnas) con pandas
+    Parámetros: ruta - Ruta del archivo CSV
     Retorna: DataFrame con los datos de Netflix
     """
     try:
-        df = pd.read_csv('DataSet/netflix_titles.csv')
+        df = pd.read_csv(ruta)
         print(f"✅ Dataset cargado exitosamente: {len(df)} registros")
         return df
     except FileNotFoundError:
-        print("❌ Error: No se encontró el archivo netflix_titles.csv")
+        print(f"❌ Error: No se encontró el archivo {Path(ruta).name}")
         return None
     except Exception as e:
         print(f"❌ Error al cargar el dataset: {e}")
@@ -118,1033 +176,3582 @@ def identificar_columnas(df):
                 print(f"   - Valores: {list(df[col].unique())}")
             print()
 
-# Evento de inicio para cargar el dataset
-@app.on_event("startup")
-async def startup_event():
-    """
-    Evento que se ejecuta al iniciar la API
-    Carga el dataset de Netflix
-    """
-    global dataset_netflix
-    print("🚀 Iniciando carga del dataset...")
-    dataset_netflix = cargar_dataset()
-    if dataset_netflix is not None:
-        print(f"✅ Dataset listo con {len(dataset_netflix)} registros")
-    else:
-        print("❌ Error: No se pudo cargar el dataset")
-
 print("✅ API FastAPI inicializada correctamente")
 print(f"📱 Título: mi aplicacion de peliculas")
 print(f"🔢 Versión: 1.0.0")
 
 # ========================================
-# ETAPA 6: RUTAS DE LA API
+# CATÁLOGO COMPACTO EN MEMORIA
 # ========================================
 
-@app.get("/", response_class=HTMLResponse)
-def ruta_inicial():
+# Columnas de texto largo guardadas fuera del DataFrame como buffer + desplazamientos
+COLUMNAS_TEXTO_LARGO = ('cast', 'description')
+
+# Columnas con pocos valores distintos que se guardan como categorías
+COLUMNAS_CATEGORICAS = ('type', 'rating', 'country', 'listed_in', 'director', 'date_added', 'duration')
+
+class ColumnaTexto:
     """
-    Ruta inicial: Interfaz del chatbot para buscar películas por descripción
+    Columna de texto guardada como un único buffer UTF-8 más un arreglo de
+    desplazamientos: evita un objeto str por fila y permite leer cualquier
+    valor con un memoryview sin copiar el buffer
     """
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="es">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Chatbot - Mi Aplicación de Películas</title>
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            body {
-                font-family: 'Netflix Sans', 'Helvetica Neue', Helvetica, Arial, sans-serif;
-                background: #141414;
-                margin: 0;
-                padding: 0;
-                min-height: 100vh;
-            }
-            
-            .container {
-                background: #141414;
-                width: 100%;
-                overflow-x: hidden;
-            }
-            
-            .navbar {
-                background: linear-gradient(to bottom, rgba(0,0,0,0.7) 0%, transparent 100%);
-                position: fixed;
-                top: 0;
-                width: 100%;
-                padding: 20px 40px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                z-index: 100;
-            }
-            
-            .navbar-logo {
-                color: #e50914;
-                font-size: 2em;
-                font-weight: bold;
-                text-decoration: none;
-            }
-            
-            .search-box {
-                background: rgba(0,0,0,0.75);
-                border: 1px solid #333;
-                color: white;
-                padding: 10px 20px;
-                border-radius: 4px;
-                font-size: 1em;
-                width: 300px;
-            }
-            
-            .hero-section {
-                position: relative;
-                height: 80vh;
-                background: linear-gradient(to bottom, rgba(0,0,0,0.4) 0%, rgba(0,0,0,0.8) 100%);
-                display: flex;
-                align-items: center;
-                padding: 60px;
-                margin-top: 70px;
-            }
-            
-            .hero-content {
-                max-width: 40%;
-                color: white;
-                z-index: 10;
-            }
-            
-            .hero-title {
-                font-size: 4em;
-                font-weight: bold;
-                margin-bottom: 20px;
-                text-shadow: 2px 2px 10px rgba(0,0,0,0.8);
-            }
-            
-            .hero-meta {
-                display: flex;
-                gap: 20px;
-                align-items: center;
-                margin-bottom: 20px;
-                font-size: 1.1em;
-            }
-            
-            .hero-meta span {
-                display: flex;
-                align-items: center;
-                gap: 5px;
-            }
-            
-            .hero-description {
-                font-size: 1.2em;
-                line-height: 1.6;
-                margin-bottom: 30px;
-                color: #e5e5e5;
-            }
-            
-            .hero-buttons {
-                display: flex;
-                gap: 15px;
-            }
-            
-            .btn {
-                padding: 12px 35px;
-                border: none;
-                border-radius: 4px;
-                font-size: 1.1em;
-                font-weight: bold;
-                cursor: pointer;
-                transition: all 0.3s;
-            }
-            
-            .btn-play {
-                background: white;
-                color: black;
-            }
-            
-            .btn-play:hover {
-                background: #e5e5e5;
-            }
-            
-            .btn-info {
-                background: rgba(109, 109, 110, 0.7);
-                color: white;
-            }
-            
-            .btn-info:hover {
-                background: rgba(109, 109, 110, 0.4);
-            }
-            
-            .header {
-                background: transparent;
-                padding: 0;
-                text-align: left;
-                border: none;
-            }
-            
-            .header h1 {
-                font-size: 2.5em;
-                margin-bottom: 10px;
-            }
-            
-            .header p {
-                font-size: 1.1em;
-                opacity: 0.9;
-            }
-            
-            .content-section {
-                padding: 40px 60px;
-            }
-            
-            .section-title {
-                color: white;
-                font-size: 1.8em;
-                margin-bottom: 20px;
-                font-weight: bold;
-            }
-            
-            .content-row {
-                margin-bottom: 50px;
-            }
-            
-            .items-container {
-                display: flex;
-                gap: 15px;
-                overflow-x: auto;
-                padding: 10px 0;
-                scroll-behavior: smooth;
-            }
-            
-            .items-container::-webkit-scrollbar {
-                height: 8px;
-            }
-            
-            .items-container::-webkit-scrollbar-track {
-                background: #141414;
-            }
-            
-            .items-container::-webkit-scrollbar-thumb {
-                background: #e50914;
-                border-radius: 10px;
-            }
-            
-            .movie-item {
-                min-width: 300px;
-                background: #1a1a1a;
-                border-radius: 4px;
-                overflow: hidden;
-                cursor: pointer;
-                transition: all 0.3s;
-                position: relative;
-            }
-            
-            .movie-item:hover {
-                transform: scale(1.05);
-                z-index: 10;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.5);
-            }
-            
-            .movie-item-cover {
-                width: 100%;
-                height: 200px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                color: white;
-                font-size: 3em;
-            }
-            
-            .movie-item-info {
-                padding: 15px;
-                color: #e5e5e5;
-            }
-            
-            .movie-item-title {
-                font-size: 1.1em;
-                font-weight: bold;
-                margin-bottom: 8px;
-                color: white;
-            }
-            
-            .movie-item-meta {
-                font-size: 0.9em;
-                color: #808080;
-            }
-            
-            .message {
-                margin-bottom: 20px;
-                animation: fadeIn 0.3s ease-in;
-            }
-            
-            @keyframes fadeIn {
-                from {
-                    opacity: 0;
-                    transform: translateY(10px);
-                }
-                to {
-                    opacity: 1;
-                    transform: translateY(0);
-                }
-            }
-            
-            .bot-message {
-                background: #2d2d2d;
-                color: #e5e5e5;
-                padding: 15px 20px;
-                border-radius: 15px;
-                max-width: 80%;
-                margin-left: 0;
-                border-left: 4px solid #e50914;
-            }
-            
-            .user-message {
-                background: #e50914;
-                color: white;
-                padding: 15px 20px;
-                border-radius: 15px;
-                max-width: 80%;
-                margin-left: auto;
-                margin-right: 0;
-                font-weight: bold;
-            }
-            
-            .input-container {
-                padding: 30px 60px;
-                background: #141414;
-                border-top: 1px solid #333;
-            }
-            
-            input[type="text"] {
-                background: rgba(0,0,0,0.75);
-                color: white;
-                border: 1px solid #333;
-            }
-            
-            .search-results {
-                background: rgba(0,0,0,0.9);
-                padding: 20px;
-                max-width: 1200px;
-                margin: 0 auto;
-            }
-            
-            .input-group {
-                display: flex;
-                gap: 10px;
-            }
-            
-            input[type="text"] {
-                flex: 1;
-                padding: 15px 20px;
-                border: 2px solid #ddd;
-                border-radius: 30px;
-                font-size: 1em;
-                outline: none;
-                transition: border-color 0.3s;
-            }
-            
-            input[type="text"]:focus {
-                border-color: #e50914;
-            }
-            
-            button {
-                padding: 15px 40px;
-                background: #e50914;
-                color: white;
-                border: none;
-                border-radius: 30px;
-                font-size: 1em;
-                cursor: pointer;
-                transition: transform 0.2s, box-shadow 0.2s;
-                font-weight: bold;
-            }
-            
-            button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 5px 20px rgba(229, 9, 20, 0.5);
-                background: #b20710;
-            }
-            
-            button:active {
-                transform: translateY(0);
-            }
-            
-            .results {
-                margin-top: 20px;
-                padding: 20px;
-                background: #141414;
-                border-radius: 10px;
-                border: 1px solid #3d3d3d;
-            }
-            
-            .movie-card {
-                background: #2d2d2d;
-                padding: 20px;
-                margin-bottom: 15px;
-                border-radius: 8px;
-                border: 1px solid #3d3d3d;
-                cursor: pointer;
-                transition: all 0.3s ease;
-                position: relative;
-            }
-            
-            .movie-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 8px 25px rgba(229, 9, 20, 0.3);
-                border-color: #e50914;
-            }
-            
-            .movie-title {
-                font-size: 1.5em;
-                font-weight: bold;
-                color: #e50914;
-                margin-bottom: 10px;
-                display: flex;
-                align-items: center;
-                gap: 10px;
-            }
-            
-            .movie-description {
-                color: #b0b0b0;
-                line-height: 1.6;
-                margin-bottom: 12px;
-                display: -webkit-box;
-                -webkit-line-clamp: 2;
-                -webkit-box-orient: vertical;
-                overflow: hidden;
-            }
-            
-            .read-more {
-                color: #e50914;
-                cursor: pointer;
-                font-weight: bold;
-                font-size: 0.9em;
-            }
-            
-            .movie-info {
-                display: flex;
-                gap: 15px;
-                flex-wrap: wrap;
-                font-size: 0.85em;
-                color: #808080;
-                margin-top: 10px;
-            }
-            
-            .movie-info span {
-                display: flex;
-                align-items: center;
-                gap: 5px;
-            }
-            
-            .loading {
-                text-align: center;
-                padding: 20px;
-                color: #e50914;
-                font-size: 1.2em;
-            }
-            
-            .error {
-                background: #3d1a1a;
-                color: #ff4444;
-                padding: 15px;
-                border-radius: 10px;
-                border-left: 4px solid #ff4444;
-            }
-            
-            .welcome-message {
-                text-align: center;
-                color: #808080;
-                padding: 30px;
-            }
-            
-            .welcome-message h2 {
-                color: #e50914;
-                margin-bottom: 15px;
-            }
-            
-            .examples {
-                margin-top: 20px;
-                padding: 15px;
-                background: #2d2d2d;
-                border-radius: 10px;
-                border-left: 4px solid #e50914;
-            }
-            
-            .examples h3 {
-                color: #e50914;
-                margin-bottom: 10px;
-            }
-            
-            .example-keywords {
-                display: flex;
-                flex-wrap: wrap;
-                gap: 10px;
-                margin-top: 10px;
-            }
-            
-            .example-keyword {
-                background: rgba(255,255,255,0.1);
-                padding: 10px 20px;
-                border-radius: 4px;
-                cursor: pointer;
-                transition: all 0.2s;
-                border: 1px solid #333;
-                color: white;
-            }
-            
-            .example-keyword:hover {
-                background: #e50914;
-                color: white;
-                border-color: #e50914;
-            }
-            
-            /* Modal Netflix Style */
-            .modal {
-                display: none;
-                position: fixed;
-                z-index: 1000;
-                left: 0;
-                top: 0;
-                width: 100%;
-                height: 100%;
-                background-color: rgba(0, 0, 0, 0.9);
-                overflow-y: auto;
-            }
-            
-            .modal-content {
-                background: linear-gradient(180deg, #141414 0%, #1a1a1a 100%);
-                margin: 50px auto;
-                padding: 0;
-                max-width: 800px;
-                border-radius: 10px;
-                box-shadow: 0 20px 60px rgba(0, 0, 0, 0.5);
-                position: relative;
-                border: 2px solid #3d3d3d;
-            }
-            
-            .modal-header {
-                background: linear-gradient(135deg, #e50914 0%, #b20710 100%);
-                padding: 30px 40px;
-                border-radius: 10px 10px 0 0;
-            }
-            
-            .modal-header h2 {
-                color: white;
-                margin: 0;
-                font-size: 2em;
-            }
-            
-            .close {
-                position: absolute;
-                right: 20px;
-                top: 20px;
-                color: white;
-                font-size: 35px;
-                font-weight: bold;
-                cursor: pointer;
-                transition: transform 0.3s;
-            }
-            
-            .close:hover {
-                transform: rotate(90deg);
-            }
-            
-            .modal-body {
-                padding: 40px;
-                color: #e5e5e5;
-            }
-            
-            .modal-synopsis {
-                font-size: 1.1em;
-                line-height: 1.8;
-                margin-bottom: 30px;
-                color: #d0d0d0;
-            }
-            
-            .modal-info-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 20px;
-                margin-bottom: 30px;
-            }
-            
-            .modal-info-item {
-                background: #2d2d2d;
-                padding: 15px;
-                border-radius: 8px;
-                border-left: 4px solid #e50914;
-            }
-            
-            .modal-info-label {
-                color: #808080;
-                font-size: 0.9em;
-                margin-bottom: 5px;
-            }
-            
-            .modal-info-value {
-                color: white;
-                font-size: 1.1em;
-                font-weight: bold;
-            }
-            
-            .modal-footer {
-                padding: 20px 40px;
-                background: #1a1a1a;
-                border-radius: 0 0 10px 10px;
-                border-top: 1px solid #3d3d3d;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="navbar">
-                <div class="navbar-logo">NETFLIX</div>
-                <input type="text" class="search-box" id="userInput" placeholder="Buscar películas..." onkeypress="if(event.key==='Enter') enviarMensaje(event)">
-            </div>
-            
-            <div class="hero-section" id="heroSection">
-                <div class="hero-content">
-                    <h1 class="hero-title">🎬 Encuentra tu próximo show favorito</h1>
-                    <div class="hero-meta">
-                        <span>⭐ 5.0</span>
-                        <span>📅 2024</span>
-                        <span>🎭 Netflix Bot</span>
-                    </div>
-                    <p class="hero-description">
-                        Describe el tipo de película que te gustaría ver y te ayudaré a encontrarla. 
-                        Usa palabras clave como "acción", "romance", "terror" o cualquier género que te interese.
-                    </p>
-                    <div class="hero-buttons">
-                        <button class="btn btn-play" onclick="empezarBusqueda()">▶ Buscar Ahora</button>
-                        <button class="btn btn-info" onclick="scrollToCategorias()">ℹ️ Ver Categorías</button>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="content-section" id="categoriasSection">
-                <h2 class="section-title">Explorar por Categorías</h2>
-                <div class="content-row">
-                    <div class="example-keywords">
-                        <span class="example-keyword" onclick="buscar('action adventure hero')">Superhéroes</span>
-                        <span class="example-keyword" onclick="buscar('romantic comedy love')">Romance</span>
-                        <span class="example-keyword" onclick="buscar('crime drama mystery')">Crimen</span>
-                        <span class="example-keyword" onclick="buscar('horror scary monster')">Terror</span>
-                        <span class="example-keyword" onclick="buscar('sci-fi space future')">Sci-Fi</span>
-                        <span class="example-keyword" onclick="buscar('family children animation')">Familia</span>
-                        <span class="example-keyword" onclick="buscar('comedy fun humor')">Comedia</span>
-                        <span class="example-keyword" onclick="buscar('documentary real life')">Documentales</span>
-                    </div>
-                </div>
-            </div>
-            
-            <div id="results"></div>
-            
-            </div>
-        
-        <script>
-            function enviarMensaje(event) {
-                event.preventDefault();
-                const input = document.getElementById('userInput');
-                const busqueda = input.value.trim();
-                
-                if (!busqueda) {
-                    alert('Por favor, escribe algo para buscar');
-                    return;
-                }
-                
-                // Mostrar carga
-                mostrarCarga();
-                
-                // Hacer la petición a la API
-                fetch(`/peliculas/descripcion/${encodeURIComponent(busqueda)}`)
-                    .then(response => {
-                        if (!response.ok) {
-                            return response.json().then(err => {
-                                throw new Error(err.detail || 'Error en la búsqueda');
-                            });
-                        }
-                        return response.json();
-                    })
-                    .then(data => {
-                        mostrarResultados(busqueda, data.peliculas, data.total);
-                    })
-                    .catch(error => {
-                        mostrarError(error.message);
-                    });
-                
-                // Limpiar el input
-                input.value = '';
-                
-                // Scroll a los resultados
-                document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
-            }
-            
-            function agregarMensajeUsuario(mensaje) {
-                // Ya no usamos mensajes de usuario en el nuevo diseño
-            }
-            
-            function mostrarCarga() {
-                const results = document.getElementById('results');
-                results.innerHTML = '<div class="loading">🔍 Buscando películas...</div>';
-            }
-            
-            function mostrarResultados(busqueda, peliculas, total) {
-                const results = document.getElementById('results');
-                
-                if (peliculas.length === 0) {
-                    results.innerHTML = '<div class="error">No se encontraron películas con esa descripción</div>';
-                    return;
-                }
-                
-                peliculasActuales = peliculas;
-                
-                let html = `<div class="content-section"><h2 class="section-title">Resultados de tu búsqueda (${total} encontradas)</h2><div class="content-row"><div class="items-container">`;
-                
-                peliculas.forEach((pelicula, index) => {
-                    const emoji = pelicula.type === 'Movie' ? '🎬' : '📺';
-                    const tipoTexto = pelicula.type === 'Movie' ? 'Película' : (pelicula.type === 'TV Show' ? 'Serie' : pelicula.type || 'N/A');
-                    html += `
-                        <div class="movie-item" onclick="verDetalle(${index})">
-                            <div class="movie-item-cover">${emoji}</div>
-                            <div class="movie-item-info">
-                                <div class="movie-item-title">${pelicula.title || 'Sin título'}</div>
-                                <div class="movie-item-meta">${tipoTexto} • ${pelicula.rating || 'N/A'} • ${pelicula.release_year || 'N/A'}</div>
-                            </div>
-                        </div>
-                    `;
-                });
-                
-                html += '</div></div></div>';
-                results.innerHTML = html;
-                
-                // Scroll a los resultados
-                results.scrollIntoView({ behavior: 'smooth' });
-            }
-            
-            function buscar(keywords) {
-                const input = document.getElementById('userInput');
-                input.value = keywords;
-                enviarMensaje(new Event('submit'));
-            }
-            
-            function empezarBusqueda() {
-                const input = document.getElementById('userInput');
-                input.focus();
-                scrollToCategorias();
-            }
-            
-            function scrollToCategorias() {
-                document.getElementById('categoriasSection').scrollIntoView({ behavior: 'smooth' });
-            }
-            
-            function mostrarError(mensaje) {
-                const results = document.getElementById('results');
-                results.innerHTML = `<div class="error">❌ Error: ${mensaje}</div>`;
-            }
-            
-            let peliculasActuales = [];
-            
-            function verDetalle(index) {
-                const pelicula = peliculasActuales[index];
-                
-                const modal = document.createElement('div');
-                modal.className = 'modal';
-                modal.innerHTML = `
-                    <div class="modal-content">
-                        <div class="modal-header">
-                            <span class="close" onclick="cerrarModal()">&times;</span>
-                            <h2>${pelicula.title || 'Sin título'}</h2>
-                        </div>
-                        <div class="modal-body">
-                            <div class="modal-synopsis">
-                                <h3>📖 Sinopsis</h3>
-                                <p>${pelicula.description || 'Sin descripción disponible'}</p>
-                            </div>
-                            <div class="modal-info-grid">
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">🎭 Tipo</div>
-                                    <div class="modal-info-value">${pelicula.type === 'Movie' ? 'Película' : (pelicula.type === 'TV Show' ? 'Serie de TV' : pelicula.type || 'N/A')}</div>
-                                </div>
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">⭐ Clasificación</div>
-                                    <div class="modal-info-value">${pelicula.rating || 'N/A'}</div>
-                                </div>
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">📅 Año</div>
-                                    <div class="modal-info-value">${pelicula.release_year || 'N/A'}</div>
-                                </div>
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">⏱️ Duración</div>
-                                    <div class="modal-info-value">${pelicula.duration || 'N/A'}</div>
-                                </div>
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">🌍 País</div>
-                                    <div class="modal-info-value">${pelicula.country || 'N/A'}</div>
-                                </div>
-                                <div class="modal-info-item">
-                                    <div class="modal-info-label">🎬 Director</div>
-                                    <div class="modal-info-value">${pelicula.director || 'N/A'}</div>
-                                </div>
-                            </div>
-                            ${pelicula.cast ? `
-                            <div class="modal-info-item" style="grid-column: 1 / -1;">
-                                <div class="modal-info-label">👥 Reparto</div>
-                                <div class="modal-info-value">${pelicula.cast}</div>
-                            </div>
-                            ` : ''}
-                            ${pelicula.listed_in ? `
-                            <div class="modal-info-item" style="grid-column: 1 / -1;">
-                                <div class="modal-info-label">🏷️ Categorías</div>
-                                <div class="modal-info-value">${pelicula.listed_in}</div>
-                            </div>
-                            ` : ''}
-                        </div>
-                        <div class="modal-footer">
-                            <button onclick="cerrarModal()" style="width: 100%;">Cerrar</button>
-                        </div>
-                    </div>
-                `;
-                
-                document.body.appendChild(modal);
-                modal.style.display = 'block';
-            }
-            
-            function cerrarModal() {
-                const modal = document.querySelector('.modal');
-                if (modal) {
-                    modal.style.display = 'none';
-                    modal.remove();
-                }
-            }
-            
-            // Cerrar modal al hacer clic fuera de él
-            window.onclick = function(event) {
-                const modal = document.querySelector('.modal');
-                if (event.target == modal) {
-                    cerrarModal();
-                }
-            }
-        </script>
-    </body>
-    </html>
+    __slots__ = ('buffer', 'desplazamientos', 'nulos')
+
+    def __init__(self, valores):
+        codificados = [v.encode('utf-8') if isinstance(v, str) else b'' for v in valores]
+        self.nulos = np.array([not isinstance(v, str) for v in valores], dtype=bool)
+        self.desplazamientos = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=self.desplazamientos[1:])
+        self.buffer = memoryview(b''.join(codificados))
+
+    def __len__(self):
+        return len(self.nulos)
+
+    def __getitem__(self, posicion):
+        if self.nulos[posicion]:
+            return None
+        inicio, fin = self.desplazamientos[posicion], self.desplazamientos[posicion + 1]
+        return str(self.buffer[inicio:fin], 'utf-8')
+
+    def tolist(self):
+        return [self[posicion] for posicion in range(len(self))]
+
+    def __reduce__(self):
+        # El memoryview no se puede serializar: se guarda el buffer como bytes
+        return (ColumnaTexto.desde_partes, (bytes(self.buffer), self.desplazamientos, self.nulos))
+
+    @staticmethod
+    def desde_partes(buffer, desplazamientos, nulos):
+        """
+        Reconstruye una columna a partir de su buffer, desplazamientos y nulos
+        """
+        columna = ColumnaTexto.__new__(ColumnaTexto)
+        columna.buffer = memoryview(buffer)
+        columna.desplazamientos = desplazamientos
+        columna.nulos = nulos
+        return columna
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.desplazamientos.nbytes + self.nulos.nbytes
+
+def compactar_dataset(df):
+    """
+    Convierte el DataFrame leído del CSV a su representación compacta:
+    categorías para las columnas repetitivas, enteros pequeños para el año y
+    los textos largos fuera del DataFrame
+    Parámetros: df - DataFrame de Netflix tal como lo devuelve cargar_dataset
+    Retorna: Tupla (DataFrame compacto, diccionario columna -> ColumnaTexto)
     """
-    return HTMLResponse(content=html_content)
+    df = df.reset_index(drop=True)
+    textos = {col: ColumnaTexto(df[col].tolist()) for col in COLUMNAS_TEXTO_LARGO if col in df.columns}
+    compacto = df.drop(columns=list(textos))
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in compacto.columns:
+            compacto[columna] = compacto[columna].astype('category')
+    if 'release_year' in compacto.columns and compacto['release_year'].notna().all():
+        compacto['release_year'] = pd.to_numeric(compacto['release_year'], downcast='integer')
+    # Orden original de las columnas para las respuestas JSON
+    compacto.attrs['columnas'] = list(df.columns)
+    return compacto, textos
 
-@app.get("/peliculas", response_class=JSONResponse)
-def lista_peliculas():
+def valores_columna(df, columna, textos=None):
     """
-    Ruta para obtener la lista de todas las películas disponibles en el dataset
+    Obtiene todos los valores de una columna, esté en el DataFrame o entre los textos largos
+    Parámetros:
+        df - DataFrame (compacto o leído del CSV)
+        columna - Nombre de la columna
+        textos - Textos largos asociados al DataFrame compacto (opcional)
+    Retorna: Lista de valores (None o NaN si falta el dato)
     """
-    if dataset_netflix is None:
-        raise HTTPException(status_code=500, detail="No se pudo cargar el dataset")
-    
-    try:
-        # Crear una copia del dataset y reemplazar todos los valores nulos
-        df_clean = dataset_netflix.copy()
-        
-        # Reemplazar NaN, NaT y None por cadenas vacías en todas las columnas
-        for col in df_clean.columns:
-            df_clean[col] = df_clean[col].replace([None, 'None', float('nan'), 'nan'], "")
-        
-        # Convertir a lista de diccionarios
-        peliculas = df_clean.to_dict(orient='records')
-        
-        # Retornar solo los primeros 100 resultados para evitar tiempos de carga
-        return JSONResponse(content={
-            "total": len(dataset_netflix),
-            "total_en_respuesta": len(peliculas[:100]),
-            "mensaje": "Mostrando primeros 100 resultados",
-            "peliculas": peliculas[:100]
-        })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener películas: {str(e)}")
+    if textos and columna in textos:
+        return textos[columna].tolist()
+    if columna in df.columns:
+        return df[columna].tolist()
+    return [None] * len(df)
 
-@app.get("/peliculas/{id}", response_class=JSONResponse)
-def pelicula_por_id(id: str):
+def construir_indice_ids(df):
     """
-    Ruta para obtener una película específica según su ID
-    Parámetros: id - ID de la película a buscar
+    Construye el índice show_id -> posición de fila (tabla hash de pandas).
+    Si un id se repite, cuenta su primera fila (igual que la búsqueda por id)
+    Parámetros: df - DataFrame compacto
+    Retorna: Tupla (pd.Index de ids sin repetir, arreglo de la posición de cada id)
     """
-    if dataset_netflix is None:
-        raise HTTPException(status_code=500, detail="No se pudo cargar el dataset")
-    
-    try:
-        # Buscar la película por su ID en la columna 'show_id'
-        pelicula = dataset_netflix[dataset_netflix['show_id'] == id]
-        
-        if pelicula.empty:
-            raise HTTPException(status_code=404, detail=f"No se encontró película con ID: {id}")
-        
-        # Convertir a diccionario reemplazando valores NaN por None
-        pelicula_dict = pelicula.fillna("").to_dict(orient='records')[0]
-        
-        return JSONResponse(content=pelicula_dict)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al buscar película: {str(e)}")
+    ids = pd.Index(df['show_id'] if 'show_id' in df.columns else [], dtype=object)
+    repetidos = ids.duplicated(keep='first')
+    ids = ids[~repetidos]
+    # La tabla hash se crea en la primera búsqueda: se fuerza ahora y no en una petición
+    ids.get_indexer(ids[:1])
+    return ids, np.flatnonzero(~repetidos)
 
-@app.get("/peliculas/categoria/{categoria}", response_class=JSONResponse)
-def peliculas_por_categoria(categoria: str):
+def posiciones_de_ids(catalogo, ids):
     """
-    Ruta para obtener lista de películas según la categoría solicitada por el usuario
-    Parámetros: categoria - Categoría a filtrar (por ejemplo: "Dramas", "Comedies", etc.)
+    Resuelve varios show_id a posiciones de fila en una sola pasada vectorizada
+    Parámetros:
+        catalogo - Catalogo a consultar
+        ids - Lista de show_id (puede tener repetidos)
+    Retorna: Arreglo de posiciones en el orden de ids (-1 para los que no existen)
     """
-    if dataset_netflix is None:
-        raise HTTPException(status_code=500, detail="No se pudo cargar el dataset")
-    
-    try:
-        # Buscar películas cuya columna 'listed_in' contenga la categoría especificada
-        peliculas = dataset_netflix[
-            dataset_netflix['listed_in'].str.contains(categoria, case=False, na=False)
+    indice, posiciones = catalogo.ids
+    encontrados = indice.get_indexer(pd.Index(ids, dtype=object))
+    return np.where(encontrados >= 0, posiciones[encontrados], -1)
+
+def registros_catalogo(catalogo, posiciones, campos=None):
+    """
+    Serializa filas del catálogo a diccionarios listos para JSON, leyendo
+    solo las filas y columnas pedidas (sin copiar ni limpiar el DataFrame completo)
+    Parámetros:
+        catalogo - Catalogo a leer
+        posiciones - Posiciones de fila (lista, arreglo o slice)
+        campos - Columnas a incluir, en orden (None para todas)
+    Retorna: Lista de diccionarios con cadenas vacías en lugar de valores nulos
+    """
+    df, textos = catalogo.df, catalogo.textos
+    if isinstance(posiciones, slice):
+        posiciones = range(*posiciones.indices(len(df)))
+    posiciones = list(posiciones)
+    vista = df.iloc[posiciones]
+
+    columnas = campos or df.attrs.get('columnas', list(df.columns))
+    valores = []
+    for columna in columnas:
+        if columna in textos:
+            texto = textos[columna]
+            valores.append([texto[p] or "" for p in posiciones])
+        else:
+            valores.append(["" if v is None or v != v else v for v in vista[columna].tolist()])
+    return [dict(zip(columnas, fila)) for fila in zip(*valores)]
+
+class FragmentosJSON:
+    """
+    Pares "columna":valor ya codificados en JSON (UTF-8) de todas las filas de
+    una columna, en un único buffer con desplazamientos. Una fila proyectada
+    se arma uniendo los fragmentos de las columnas pedidas, sin limpiar nulos
+    ni codificar JSON en cada petición
+    """
+    __slots__ = ('buffer', 'desplazamientos')
+
+    def __init__(self, columna, valores):
+        prefijo = json.dumps(columna, ensure_ascii=False) + ':'
+        codificados = [
+            (prefijo + json.dumps("" if v is None or v != v else v, ensure_ascii=False)).encode('utf-8')
+            for v in valores
         ]
-        
-        if peliculas.empty:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"No se encontraron películas en la categoría: {categoria}"
-            )
-        
-        # Convertir a lista de diccionarios reemplazando valores NaN por None
-        peliculas_list = peliculas.fillna("").to_dict(orient='records')
-        
-        return JSONResponse(content={
-            "categoria": categoria,
-            "total": len(peliculas_list),
-            "peliculas": peliculas_list
-        })
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al filtrar por categoría: {str(e)}")
+        self.desplazamientos = array('q', [0])
+        for fragmento in codificados:
+            self.desplazamientos.append(self.desplazamientos[-1] + len(fragmento))
+        self.buffer = b''.join(codificados)
+
+    def __getitem__(self, posicion):
+        return self.buffer[self.desplazamientos[posicion]:self.desplazamientos[posicion + 1]]
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.desplazamientos.itemsize * len(self.desplazamientos)
+
+def filas_json(catalogo, posiciones, campos=None):
+    """
+    Codifica filas del catálogo como objetos JSON uniendo fragmentos precodificados
+    Parámetros:
+        catalogo - Catalogo a leer
+        posiciones - Posiciones de fila (lista, arreglo o slice)
+        campos - Columnas a incluir, en orden (None para todas)
+    Retorna: Lista de bytes, un objeto JSON por fila
+    """
+    if isinstance(posiciones, slice):
+        posiciones = range(*posiciones.indices(len(catalogo)))
+    columnas = campos or catalogo.df.attrs.get('columnas', list(catalogo.df.columns))
+    fragmentos = [catalogo.fragmentos_de(columna) for columna in columnas]
+    return [b'{' + b','.join([f[p] for f in fragmentos]) + b'}' for p in map(int, posiciones)]
+
+def miembros_json(contenido):
+    """
+    Codifica los pares clave:valor de un diccionario sin las llaves exteriores
+    (mismo formato compacto que JSONResponse)
+    Retorna: Bytes (vacíos si el diccionario está vacío)
+    """
+    return json.dumps(contenido, ensure_ascii=False, separators=(',', ':')).encode('utf-8')[1:-1]
+
+def json_con_filas(contenido, filas, clave='peliculas'):
+    """
+    Codifica una respuesta JSON cuyo campo clave es la lista de filas ya codificadas.
+    Las claves anteriores y posteriores se codifican por separado y se unen
+    alrededor de las filas (nunca se busca nada dentro del texto codificado)
+    Parámetros:
+        contenido - Diccionario con el resto de la respuesta (el orden se respeta;
+                    si incluye clave, las filas van en su lugar)
+        filas - Lista de bytes devuelta por filas_json
+        clave - Campo donde van las filas
+    Retorna: Bytes del documento JSON
+    """
+    claves = list(contenido)
+    corte = claves.index(clave) if clave in contenido else len(claves)
+    partes = [
+        miembros_json({c: contenido[c] for c in claves[:corte]}),
+        json.dumps(clave, ensure_ascii=False).encode('utf-8') + b':[' + b','.join(filas) + b']',
+        miembros_json({c: contenido[c] for c in claves[corte + 1:]}),
+    ]
+    return b'{' + b','.join(parte for parte in partes if parte) + b'}'
+
+def respuesta_json(cuerpo, status_code=200):
+    """
+    Retorna: Response con un cuerpo JSON ya codificado
+    """
+    return Response(content=cuerpo, status_code=status_code, media_type="application/json")
+
+def tamano_profundo(objeto, vistos=None):
+    """
+    Estima los bytes que ocupa un objeto incluyendo lo que referencia
+    (diccionarios, listas, tuplas, conjuntos, arreglos numpy, índices y DataFrames de pandas)
+    """
+    if vistos is None:
+        vistos = set()
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes
+    if isinstance(objeto, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(objeto.memory_usage(deep=True).sum()) if isinstance(objeto, pd.DataFrame) \
+            else int(objeto.memory_usage(deep=True))
+    if isinstance(objeto, (ColumnaTexto, FragmentosJSON)):
+        return objeto.nbytes
+
+    tamano = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        tamano += sum(tamano_profundo(k, vistos) + tamano_profundo(v, vistos) for k, v in objeto.items())
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        tamano += sum(tamano_profundo(v, vistos) for v in objeto)
+    elif hasattr(objeto, '__slots__'):
+        tamano += sum(tamano_profundo(getattr(objeto, s), vistos) for s in objeto.__slots__ if hasattr(objeto, s))
+    return tamano
 
 # ========================================
-# ETAPA 7: RUTA DEL CHATBOT - FILTRO POR DESCRIPCIÓN
+# CATÁLOGOS: SNAPSHOTS, REGISTRO Y CARGA PEREZOSA
 # ========================================
 
-# Importar stopwords para filtrar palabras comunes
-from nltk.corpus import stopwords
+class Catalogo:
+    """
+    Snapshot inmutable de un catálogo: DataFrame compacto, textos largos,
+    índices, estadísticas y versión. Un catálogo recargado es un objeto nuevo,
+    así que las peticiones en curso siguen usando el snapshot con el que empezaron
+    """
 
-# Obtener lista de stopwords en inglés
-try:
-    stop_words = set(stopwords.words('english'))
-except:
-    stop_words = set()
+    def __init__(self, id, ruta, version, df, textos, personas, estadisticas, rangos, textual,
+                 origen='csv', bytes=None):
+        self.id = id
+        self.ruta = ruta
+        self.version = version
+        self.df = df
+        self.textos = textos
+        self.personas = personas
+        self.estadisticas = estadisticas
+        self.rangos = rangos
+        self.textual = textual
+        self.origen = origen
+        self.ids = construir_indice_ids(df)
+        self.fragmentos = {}
+        self.candado_fragmentos = threading.Lock()
+        # Medir es un recorrido completo de los índices: los artefactos traen la medida hecha
+        self.bytes = bytes if bytes is not None else (
+            tamano_profundo(df) + sum(t.nbytes for t in textos.values()) + tamano_profundo(personas)
+            + tamano_profundo(estadisticas) + tamano_profundo(rangos) + tamano_profundo(textual['campos'])
+            + tamano_profundo(textual['correccion'])
+            + self.ids[0].memory_usage(deep=True) + self.ids[1].nbytes
+        )
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columnas(self):
+        """
+        Retorna: Columnas del catálogo en el orden original del CSV
+        """
+        return self.df.attrs.get('columnas', list(self.df.columns))
 
-def limpiar_y_tokenizar(texto):
+    def fragmentos_de(self, columna):
+        """
+        Obtiene los fragmentos JSON de una columna, codificándolos la primera
+        vez que se piden (solo ocupan memoria las columnas que se proyectan)
+        """
+        fragmentos = self.fragmentos.get(columna)
+        if fragmentos is None:
+            with self.candado_fragmentos:
+                fragmentos = self.fragmentos.get(columna)
+                if fragmentos is None:
+                    fragmentos = FragmentosJSON(columna, valores_columna(self.df, columna, self.textos))
+                    self.fragmentos[columna] = fragmentos
+                    self.bytes += fragmentos.nbytes
+        return fragmentos
+
+def construir_catalogo(id, ruta, version, df, anterior=None):
     """
-    Limpia y tokeniza un texto eliminando stopwords
-    Parámetros: texto - Texto a limpiar y tokenizar
-    Retorna: Lista de palabras tokenizadas y limpiadas
+    Construye los índices y estadísticas de un dataset. Si hay un snapshot
+    anterior del mismo catálogo, las estadísticas se actualizan de forma
+    incremental con las filas que cambiaron
+    Parámetros:
+        id, ruta - Identificador y archivo del catálogo
+        version - Versión del nuevo snapshot
+        df - DataFrame de Netflix recién cargado
+        anterior - Catalogo publicado antes (opcional)
+    Retorna: Catalogo listo para publicar
     """
-    if texto is None or pd.isna(texto):
-        return []
-    
-    # Tokenizar el texto
-    tokens = word_tokenize(str(texto).lower())
-    
-    # Filtrar stopwords y solo mantener palabras alfanuméricas
-    palabras_limpias = [palabra for palabra in tokens 
-                       if palabra.isalnum() and palabra not in stop_words]
-    
-    return palabras_limpias
+    df, textos = compactar_dataset(df)
+    indices, _ = construir_indices(df, textos, anterior)
+    return Catalogo(id, ruta, version, df, textos, **indices)
 
-def buscar_peliculas_por_descripcion(descripcion_usuario, dataset):
+def cronometrar(funcion, *args):
     """
-    Busca películas que contengan palabras clave de la descripción del usuario
-    Parámetros: 
-        descripcion_usuario - Descripción o palabras clave del usuario
-        dataset - DataFrame con las películas
-    Retorna: Lista de películas que coinciden
+    Ejecuta una función y mide cuánto tarda
+    Retorna: Tupla (resultado, segundos)
     """
-    # Tokenizar y limpiar la descripción del usuario
-    palabras_usuario = limpiar_y_tokenizar(descripcion_usuario)
-    
-    if not palabras_usuario:
-        return pd.DataFrame()
-    
-    # Buscar películas cuyas descripciones contengan las palabras del usuario
-    peliculas_encontradas = []
-    
-    for idx, row in dataset.iterrows():
-        descripcion = row.get('description', '')
-        if pd.isna(descripcion):
-            continue
-        
-        # Tokenizar la descripción de la película
-        palabras_descripcion = limpiar_y_tokenizar(descripcion)
-        
-        # Contar cuántas palabras del usuario aparecen en la descripción
-        palabras_coincidentes = set(palabras_usuario) & set(palabras_descripcion)
-        
-        if palabras_coincidentes:
-            peliculas_encontradas.append({
-                'indice': idx,
-                'coincidencias': len(palabras_coincidentes),
-                'palabras_clave': list(palabras_coincidentes)
-            })
-    
-    # Ordenar por número de coincidencias (las que más coincidencias tienen primero)
-    peliculas_encontradas.sort(key=lambda x: x['coincidencias'], reverse=True)
-    
-    # Obtener los índices de las películas encontradas
-    indices = [p['indice'] for p in peliculas_encontradas]
-    
-    # Retornar las películas ordenadas por relevancia
-    peliculas_resultado = dataset.loc[indices].copy()
-    
-    # Agregar información de relevancia
-    for i, idx in enumerate(indices):
-        if idx in peliculas_resultado.index:
-            peliculas_resultado.at[idx, '_relevancia'] = peliculas_encontradas[i]['coincidencias']
-            peliculas_resultado.at[idx, '_palabras_clave'] = ', '.join(peliculas_encontradas[i]['palabras_clave'])
-    
-    return peliculas_resultado
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
 
-@app.get("/peliculas/descripcion/{descripcion}", response_class=JSONResponse)
-def peliculas_por_descripcion(descripcion: str):
+def tokenizar_valores(valores):
     """
-    Ruta del chatbot para obtener lista de películas que coinciden con la descripción del usuario
-    Parámetros: descripcion - Descripción o palabras clave que el usuario busca
-    Ejemplo: /peliculas/descripcion/action adventure hero
+    Tokeniza con posiciones un bloque de valores de una columna
+    (función de nivel de módulo para poder enviarla a otros procesos)
     """
-    if dataset_netflix is None:
-        raise HTTPException(status_code=500, detail="No se pudo cargar el dataset")
-    
-    try:
-        # Buscar películas que coinciden con la descripción
-        peliculas = buscar_peliculas_por_descripcion(descripcion, dataset_netflix)
-        
-        if peliculas.empty:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"No se encontraron películas que coincidan con: {descripcion}"
-            )
-        
-        # Limpiar valores NaN antes de convertir a diccionario
-        peliculas_limpias = peliculas.fillna("").to_dict(orient='records')
-        
-        # Limpiar las columnas temporales de relevancia
-        for pelicula in peliculas_limpias:
-            if '_relevancia' in pelicula:
-                relevancia = pelicula.pop('_relevancia', 0)
-            if '_palabras_clave' in pelicula:
-                palabras_clave = pelicula.pop('_palabras_clave', '')
-        
-        return JSONResponse(content={
-            "busqueda": descripcion,
-            "total": len(peliculas_limpias),
-            "peliculas": peliculas_limpias[:50]  # Limitar a 50 resultados
-        })
-    except HTTPException:
-        raise
-    except Exception as e:
+    return [tokenizar_con_posiciones(valor) for valor in valores]
+
+def construir_indices(df, textos, anterior=None, ejecutor=None, procesos=1):
+    """
+    Construye las estadísticas y los índices de un catálogo compacto. Con un
+    ejecutor de procesos, las estadísticas, el índice de personas, los rangos
+    y la tokenización (por bloques de filas) se reparten entre núcleos
+    Parámetros:
+        df, textos - Catálogo compacto devuelto por compactar_dataset
+        anterior - Catalogo anterior para actualizar las estadísticas (opcional)
+        ejecutor - ProcessPoolExecutor para repartir el trabajo (opcional)
+        procesos - Bloques en los que se divide cada columna a tokenizar
+    Retorna: Tupla (diccionario con estadisticas, personas, rangos y textual, segundos por etapa)
+    """
+    if anterior is None:
+        tareas = {'estadisticas': (construir_estadisticas, df)}
+    else:
+        tareas = {'estadisticas': (actualizar_estadisticas, anterior.estadisticas, anterior.df, df)}
+    tareas['personas'] = (construir_indice_personas, df, textos)
+    tareas['rangos'] = (construir_indice_rangos, df)
+    for columna in COLUMNAS_INDEXADAS:
+        valores = valores_columna(df, columna, textos)
+        tamano = max(1, math.ceil(len(valores) / max(procesos, 1)))
+        for inicio in range(0, len(valores), tamano):
+            tareas[('tokens', columna, inicio)] = (tokenizar_valores, valores[inicio:inicio + tamano])
+
+    # Los bloques de tokenización corren a la vez: su tiempo es el de reloj
+    # hasta que termina el último bloque (la suma por proceso queda como _cpu)
+    inicio = time.perf_counter()
+    if ejecutor is None:
+        resultados = {clave: cronometrar(*tarea) for clave, tarea in tareas.items()}
+        fin_tokenizacion = time.perf_counter()
+    else:
+        futuros = {clave: ejecutor.submit(cronometrar, *tarea) for clave, tarea in tareas.items()}
+        wait([futuro for clave, futuro in futuros.items() if isinstance(clave, tuple)])
+        fin_tokenizacion = time.perf_counter()
+        resultados = {clave: futuro.result() for clave, futuro in futuros.items()}
+
+    # Los bloques se unen en el orden de las filas
+    tokens_por_columna = {columna: [] for columna in COLUMNAS_INDEXADAS}
+    tiempos = {'tokenizacion': fin_tokenizacion - inicio, 'tokenizacion_cpu': 0.0}
+    indices = {}
+    for clave, (resultado, segundos) in resultados.items():
+        if isinstance(clave, tuple):
+            tokens_por_columna[clave[1]].extend(resultado)
+            tiempos['tokenizacion_cpu'] += segundos
+        else:
+            indices[clave] = resultado
+            tiempos[clave] = segundos
+
+    indices['textual'], tiempos['indice_textual'] = cronometrar(
+        construir_indice_textual, df, textos, tokens_por_columna
+    )
+    return indices, tiempos
+
+def leer_configuracion_catalogos():
+    """
+    Lee los catálogos disponibles de la variable de entorno CATALOGOS
+    (por ejemplo: "netflix=DataSet/netflix_titles.csv,latam=DataSet/latam.csv")
+    Retorna: Diccionario id -> ruta del CSV (el primero es el catálogo por defecto)
+    """
+    configuracion = os.environ.get("CATALOGOS", "").strip()
+    if not configuracion:
+        return {'netflix': RUTA_DATASET}
+    catalogos = {}
+    for entrada in configuracion.split(','):
+        id, _, ruta = entrada.partition('=')
+        if id.strip() and ruta.strip():
+            catalogos[id.strip()] = ruta.strip()
+    return catalogos
+
+class RegistroCatalogos:
+    """
+    Registro de catálogos regionales. Cada catálogo se carga la primera vez que
+    se usa, las cargas concurrentes del mismo catálogo se resuelven con una
+    sola lectura, y cuando la memoria de los catálogos cargados supera el
+    presupuesto se expulsa el usado menos recientemente
+    """
+
+    def __init__(self, rutas, memoria_maxima):
+        self.rutas = rutas
+        self.memoria_maxima = memoria_maxima
+        self.cargados = OrderedDict()
+        self.cargando = {}
+        self.versiones = Counter()
+        self.candado = threading.Lock()
+        self.aciertos = 0
+        self.cargas = 0
+        self.cargas_compartidas = 0
+        self.expulsiones = 0
+
+    def obtener_cargado(self, id):
+        """
+        Retorna: El catálogo si ya está en memoria (sin bloquear), o None
+        """
+        with self.candado:
+            catalogo = self.cargados.get(id)
+            if catalogo is not None:
+                self.cargados.move_to_end(id)
+                self.aciertos += 1
+            return catalogo
+
+    def obtener(self, id):
+        """
+        Obtiene un catálogo cargándolo si hace falta (bloquea mientras se carga)
+        Parámetros: id - Identificador del catálogo
+        Retorna: Catalogo
+        """
+        if id not in self.rutas:
+            raise KeyError(id)
+        catalogo = self.obtener_cargado(id)
+        if catalogo is not None:
+            return catalogo
+
+        with self.candado:
+            catalogo = self.cargados.get(id)
+            if catalogo is not None:
+                return catalogo
+            futuro = self.cargando.get(id)
+            es_lider = futuro is None
+            if es_lider:
+                futuro = self.cargando[id] = Future()
+            else:
+                self.cargas_compartidas += 1
+
+        if not es_lider:
+            return futuro.result()
+
+        try:
+            catalogo = self.cargar(id)
+            futuro.set_result(catalogo)
+            return catalogo
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self.candado:
+                self.cargando.pop(id, None)
+
+    def cargar(self, id, anterior=None):
+        """
+        Lee el CSV de un catálogo, construye su snapshot y lo publica
+        Parámetros:
+            id - Identificador del catálogo
+            anterior - Snapshot anterior para actualizar las estadísticas (opcional)
+        Retorna: Catalogo publicado
+        """
+        print(f"🚀 Cargando catálogo '{id}'...")
+        with self.candado:
+            self.versiones[id] += 1
+            version = self.versiones[id]
+
+        # Si build-index dejó artefactos vigentes para este CSV, solo se cargan
+        catalogo = cargar_artefacto(id, self.rutas[id], version)
+        if catalogo is None:
+            df = cargar_dataset(self.rutas[id])
+            if df is None:
+                raise RuntimeError(f"No se pudo cargar el catálogo: {id}")
+            catalogo = construir_catalogo(id, self.rutas[id], version, df, anterior)
+
+        with self.candado:
+            self.cargados[id] = catalogo
+            self.cargados.move_to_end(id)
+            self.cargas += 1
+            self.expulsar_excedente()
+        print(f"✅ Catálogo '{id}' listo: {len(catalogo)} registros, {catalogo.bytes / 1e6:.1f} MB")
+        return catalogo
+
+    def recargar(self, id):
+        """
+        Vuelve a leer un catálogo y publica un nuevo snapshot
+        Retorna: Catalogo publicado
+        """
+        if id not in self.rutas:
+            raise KeyError(id)
+        anterior = self.obtener_cargado(id)
+        catalogo = self.cargar(id, anterior)
+        # Las claves llevan la versión, así que las entradas del snapshot anterior
+        # ya no se consultan: se liberan solo las de este catálogo
+        cache_busquedas.limpiar(id)
+        cache_resultados.limpiar(id)
+        return catalogo
+
+    def expulsar_excedente(self):
+        """
+        Expulsa catálogos menos usados mientras se supere el presupuesto de memoria
+        (siempre se conserva al menos el más reciente). Se llama con el candado tomado
+        """
+        while len(self.cargados) > 1 and sum(c.bytes for c in self.cargados.values()) > self.memoria_maxima:
+            id, _ = self.cargados.popitem(last=False)
+            self.expulsiones += 1
+            print(f"♻️ Catálogo '{id}' expulsado de memoria")
+
+    def metricas(self):
+        """
+        Retorna: Diccionario con los catálogos configurados, los cargados y los contadores
+        """
+        with self.candado:
+            return {
+                "memoria_maxima_bytes": self.memoria_maxima,
+                "memoria_usada_bytes": sum(c.bytes for c in self.cargados.values()),
+                "configurados": list(self.rutas),
+                "cargados": {
+                    id: {"version": c.version, "origen": c.origen, "registros": len(c), "bytes": c.bytes}
+                    for id, c in self.cargados.items()
+                },
+                "cargando": list(self.cargando),
+                "aciertos": self.aciertos,
+                "cargas": self.cargas,
+                "cargas_compartidas": self.cargas_compartidas,
+                "expulsiones": self.expulsiones,
+            }
+
+# Registro global de catálogos (el primero configurado es el catálogo por defecto)
+registro_catalogos = RegistroCatalogos(
+    leer_configuracion_catalogos(),
+    int(float(os.environ.get("CATALOGOS_MEMORIA_MAXIMA_MB", 1024)) * 1024 * 1024),
+)
+CATALOGO_POR_DEFECTO = next(iter(registro_catalogos.rutas))
+
+async def obtener_catalogo(catalogo: str = CATALOGO_POR_DEFECTO):
+    """
+    Dependencia común de las rutas: resuelve el parámetro ?catalogo= al
+    snapshot cargado, cargándolo en el pool de hilos si aún no está en memoria
+    """
+    if catalogo not in registro_catalogos.rutas:
+        raise HTTPException(status_code=404, detail=f"No existe el catálogo: {catalogo}")
+    cargado = registro_catalogos.obtener_cargado(catalogo)
+    if cargado is not None:
+        return cargado
+    try:
+        return await run_in_threadpool(registro_catalogos.obtener, catalogo)
+    except Exception:
+        raise HTTPException(status_code=500, detail="No se pudo cargar el dataset")
+
+async def parametros_campos(fields: Optional[str] = None, catalogo: Catalogo = Depends(obtener_catalogo)):
+    """
+    Parámetro de consulta compartido para proyectar columnas
+    (por ejemplo: fields=show_id,title)
+    Retorna: Tupla de columnas en el orden pedido, o None para todas
+    """
+    if not fields:
+        return None
+    campos = tuple(dict.fromkeys(campo.strip() for campo in fields.split(',') if campo.strip()))
+    desconocidos = [campo for campo in campos if campo not in catalogo.columnas]
+    if desconocidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos no válidos: {', '.join(desconocidos)}. Disponibles: {', '.join(catalogo.columnas)}"
+        )
+    return campos or None
+
+# ========================================
+# ARRANQUE EN SEGUNDO PLANO Y SALUD DEL SERVICIO
+# ========================================
+
+class EstadoArranque:
+    """
+    Progreso del arranque: el servidor acepta conexiones enseguida y el
+    catálogo por defecto, sus fragmentos JSON y las búsquedas rápidas de la
+    página inicial se preparan en segundo plano. Solo se modifica desde el
+    bucle de eventos, así que no necesita candado
+    """
+
+    def __init__(self):
+        self.fase = 'iniciando'
+        self.inicio = time.monotonic()
+        self.pasos = []
+        self.completados = 0
+        self.duracion = None
+        self.error = None
+        self.tarea = None
+
+    def planificar(self, pasos):
+        self.pasos = [{"paso": paso, "estado": "pendiente", "segundos": None} for paso in pasos]
+
+    def completar(self, indice, segundos, error=None):
+        self.pasos[indice].update(estado="error" if error else "listo", segundos=round(segundos, 4))
+        if error:
+            self.pasos[indice]["error"] = error
+        self.completados += 1
+
+    def terminar(self, error=None):
+        self.fase = 'error' if error else 'listo'
+        self.error = error
+        self.duracion = round(time.monotonic() - self.inicio, 3)
+
+    @property
+    def listo(self):
+        return self.fase == 'listo'
+
+    def reporte(self):
+        """
+        Retorna: Diccionario con la fase, el avance y el detalle de cada paso
+        """
+        return {
+            "fase": self.fase,
+            "listo": self.listo,
+            "progreso": {"completados": self.completados, "total": len(self.pasos)},
+            "segundos_activo": round(time.monotonic() - self.inicio, 3),
+            "duracion_arranque": self.duracion,
+            "error": self.error,
+            "pasos": self.pasos,
+        }
+
+estado_arranque = EstadoArranque()
+
+def consultas_pagina_inicial():
+    """
+    Retorna: Búsquedas de los atajos de la página inicial (las que más se repiten)
+    """
+    return re.findall(r"buscar\('([^']*)'\)", PAGINA_INICIAL_HTML)
+
+def precalentar_busqueda(catalogo, descripcion, rangos):
+    """
+    Resuelve una búsqueda igual que la ruta por descripción para dejar sus
+    posiciones fijadas en caché (no vencen con el TTL) y codificada su primera página
+    Retorna: Número de resultados
+    """
+    consulta, _, clave_resultados = preparar_consulta(catalogo, descripcion, rangos)
+    posiciones = posiciones_busqueda(catalogo, consulta, rangos, None, clave_resultados)
+    cache_resultados.fijar(clave_resultados, posiciones)
+    filas_json(catalogo, posiciones[:LIMITE_PAGINA_DESCRIPCION])
+    return len(posiciones)
+
+async def precalentar_servicio():
+    """
+    Carga el catálogo por defecto, codifica sus fragmentos JSON y precalienta
+    las búsquedas rápidas de la página inicial, anotando el avance en estado_arranque
+    """
+    consultas = consultas_pagina_inicial()
+    estado_arranque.planificar(['catalogo', 'fragmentos'] + [f"busqueda:{c}" for c in consultas])
+    estado_arranque.fase = 'cargando'
+    print("🚀 Iniciando carga del dataset...")
+    inicio = time.perf_counter()
+    try:
+        catalogo = await run_in_threadpool(registro_catalogos.obtener, CATALOGO_POR_DEFECTO)
+    except Exception as e:
+        estado_arranque.completar(0, time.perf_counter() - inicio, str(e))
+        estado_arranque.terminar(f"No se pudo cargar el dataset: {e}")
+        print(f"❌ Error: No se pudo cargar el dataset ({e})")
+        return
+    estado_arranque.completar(0, time.perf_counter() - inicio)
+    print(f"✅ Índice de personas listo con {len(catalogo.personas['personas'])} personas")
+    reporte = catalogo.textual['reporte']['description']
+    print(f"✅ Índice textual listo: {reporte['vocabulario_indexado']} lemas en descripciones "
+          f"({reporte['vocabulario_original']} palabras sin lematizar)")
+    print(f"✅ Dataset listo con {len(catalogo)} registros")
+
+    estado_arranque.fase = 'precalentando'
+    inicio = time.perf_counter()
+    await run_in_threadpool(lambda: [catalogo.fragmentos_de(columna) for columna in catalogo.columnas])
+    estado_arranque.completar(1, time.perf_counter() - inicio)
+
+    # Una búsqueda que falla no impide atender tráfico: queda anotada en su paso
+    rangos = await parametros_rango()
+    for indice, consulta in enumerate(consultas, start=2):
+        inicio = time.perf_counter()
+        try:
+            await run_in_threadpool(precalentar_busqueda, catalogo, consulta, rangos)
+            estado_arranque.completar(indice, time.perf_counter() - inicio)
+        except Exception as e:
+            estado_arranque.completar(indice, time.perf_counter() - inicio, str(e))
+            print(f"⚠️ No se pudo precalentar la búsqueda '{consulta}': {e}")
+    estado_arranque.terminar()
+    print(f"✅ Servicio listo en {estado_arranque.duracion:.2f} s ({len(consultas)} búsquedas precalentadas)")
+
+# Evento de inicio: el precalentamiento corre en segundo plano para no retrasar el arranque
+@app.on_event("startup")
+async def startup_event():
+    """
+    Evento que se ejecuta al iniciar la API
+    Lanza la carga del catálogo por defecto en segundo plano (uvicorn abre el
+    puerto en cuanto termina este evento); los demás catálogos se cargan al usarse
+    """
+    estado_arranque.tarea = asyncio.create_task(precalentar_servicio())
+
+@app.get("/health/live", response_class=JSONResponse)
+async def salud_viva():
+    """
+    Ruta de vida: responde mientras el proceso y su bucle de eventos funcionan
+    (aunque el catálogo todavía se esté cargando)
+    """
+    return JSONResponse(content={
+        "estado": "vivo",
+        "fase": estado_arranque.fase,
+        "segundos_activo": round(time.monotonic() - estado_arranque.inicio, 3),
+    })
+
+@app.get("/health/ready", response_class=JSONResponse)
+async def salud_lista():
+    """
+    Ruta de disponibilidad: 200 cuando el catálogo por defecto está cargado y
+    precalentado, 503 con el avance del arranque mientras tanto o si falló
+    """
+    return JSONResponse(content=estado_arranque.reporte(), status_code=200 if estado_arranque.listo else 503)
+
+@app.get("/admin/catalogos", response_class=JSONResponse)
+async def metricas_catalogos():
+    """
+    Ruta para consultar los catálogos cargados, su memoria y las expulsiones
+    """
+    return JSONResponse(content=registro_catalogos.metricas())
+
+@app.get("/admin/memoria", response_class=JSONResponse)
+def reporte_memoria(catalogo: Catalogo = Depends(obtener_catalogo)):
+    """
+    Ruta para consultar los bytes que ocupa cada columna del catálogo y cada índice
+    """
+    df, textos = catalogo.df, catalogo.textos
+    uso = df.memory_usage(deep=True)
+    columnas = {}
+    for columna in df.attrs.get('columnas', list(df.columns)):
+        if columna in textos:
+            columnas[columna] = {"bytes": int(textos[columna].nbytes), "representacion": "buffer+desplazamientos"}
+        else:
+            columnas[columna] = {"bytes": int(uso[columna]), "representacion": str(df[columna].dtype)}
+
+    indices = {
+        "personas": tamano_profundo(catalogo.personas),
+        "estadisticas": tamano_profundo(catalogo.estadisticas),
+        "rangos": tamano_profundo(catalogo.rangos),
+        "textual": tamano_profundo(catalogo.textual['campos']),
+        "tabla_lemas": tamano_profundo(catalogo.textual['lemas']),
+        "correccion": tamano_profundo(catalogo.textual['correccion']),
+        "ids": tamano_profundo(catalogo.ids),
+    }
+    # Los fragmentos JSON se codifican bajo demanda: se cuentan los de las columnas ya pedidas
+    with catalogo.candado_fragmentos:
+        fragmentos = dict(catalogo.fragmentos)
+    indices["fragmentos"] = sum(f.nbytes for f in fragmentos.values())
+    return JSONResponse(content={
+        "catalogo": catalogo.id,
+        "version": catalogo.version,
+        "filas": len(df),
+        "columnas": columnas,
+        "total_columnas": sum(c["bytes"] for c in columnas.values()),
+        "indices": indices,
+        "total_indices": sum(indices.values())
+    })
+
+# ========================================
+# RECURSOS ESTÁTICOS Y PÁGINA INICIAL PRE-RENDERIZADA
+# ========================================
+
+# Carpeta con las hojas de estilo y scripts de la interfaz
+DIRECTORIO_ESTATICO = Path(__file__).resolve().parent / 'static'
+
+# Cabeceras de caché: los recursos con huella digital nunca cambian de URL,
+# la página inicial se revalida con su ETag en cada visita (solo se publican
+# las huellas actuales, así que un HTML viejo en caché enlazaría recursos inexistentes)
+CACHE_RECURSOS_ESTATICOS = "public, max-age=31536000, immutable"
+CACHE_PAGINA_INICIAL = "no-cache"
+
+# Tamaño mínimo para que valga la pena servir la variante comprimida
+TAMANO_MINIMO_COMPRESION = 512
+
+PAGINA_INICIAL_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Chatbot - Mi Aplicación de Películas</title>
+    <link rel="stylesheet" href="__CSS_URL__">
+</head>
+<body>
+    <div class="container">
+        <div class="navbar">
+            <div class="navbar-logo">NETFLIX</div>
+            <input type="text" class="search-box" id="userInput" placeholder="Buscar películas..." onkeypress="if(event.key==='Enter') enviarMensaje(event)">
+        </div>
+
+        <div class="hero-section" id="heroSection">
+            <div class="hero-content">
+                <h1 class="hero-title">🎬 Encuentra tu próximo show favorito</h1>
+                <div class="hero-meta">
+                    <span>⭐ 5.0</span>
+                    <span>📅 2024</span>
+                    <span>🎭 Netflix Bot</span>
+                </div>
+                <p class="hero-description">
+                    Describe el tipo de película que te gustaría ver y te ayudaré a encontrarla.
+                    Usa palabras clave como "acción", "romance", "terror" o cualquier género que te interese.
+                </p>
+                <div class="hero-buttons">
+                    <button class="btn btn-play" onclick="empezarBusqueda()">▶ Buscar Ahora</button>
+                    <button class="btn btn-info" onclick="scrollToCategorias()">ℹ️ Ver Categorías</button>
+                </div>
+            </div>
+        </div>
+
+        <div class="content-section" id="categoriasSection">
+            <h2 class="section-title">Explorar por Categorías</h2>
+            <div class="content-row">
+                <div class="example-keywords">
+                    <span class="example-keyword" onclick="buscar('action adventure hero')">Superhéroes</span>
+                    <span class="example-keyword" onclick="buscar('romantic comedy love')">Romance</span>
+                    <span class="example-keyword" onclick="buscar('crime drama mystery')">Crimen</span>
+                    <span class="example-keyword" onclick="buscar('horror scary monster')">Terror</span>
+                    <span class="example-keyword" onclick="buscar('sci-fi space future')">Sci-Fi</span>
+                    <span class="example-keyword" onclick="buscar('family children animation')">Familia</span>
+                    <span class="example-keyword" onclick="buscar('comedy fun humor')">Comedia</span>
+                    <span class="example-keyword" onclick="buscar('documentary real life')">Documentales</span>
+                </div>
+            </div>
+        </div>
+
+        <div id="results"></div>
+
+        </div>
+    <script src="__JS_URL__"></script>
+</body>
+</html>
+"""
+
+def precodificar_recurso(contenido, tipo_contenido):
+    """
+    Codifica un recurso una sola vez junto con su variante gzip y su ETag
+    Parámetros:
+        contenido - Bytes del recurso
+        tipo_contenido - Valor de la cabecera Content-Type
+    Retorna: Diccionario con el cuerpo, la variante comprimida y el ETag de cada una
+    """
+    huella = hashlib.sha256(contenido).hexdigest()
+    comprimido = None
+    if len(contenido) >= TAMANO_MINIMO_COMPRESION:
+        # mtime=0 para que la salida sea determinista entre reinicios
+        comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+        if len(comprimido) >= len(contenido):
+            comprimido = None
+    return {
+        'contenido': contenido,
+        'gzip': comprimido,
+        'etag': f'"{huella[:32]}"',
+        # Cada codificación es una representación distinta: su propio ETag fuerte
+        'etag_gzip': f'"{huella[:32]}-gzip"',
+        'huella': huella[:12],
+        'tipo': tipo_contenido,
+    }
+
+def cargar_recursos_estaticos():
+    """
+    Lee los recursos de la carpeta static y los publica con un nombre que
+    incluye la huella de su contenido (por ejemplo: estilos.3f2a9c1b0d4e.css)
+    Retorna: Diccionario nombre publicado -> recurso precodificado
+    """
+    tipos = {
+        '.css': 'text/css; charset=utf-8',
+        '.js': 'application/javascript; charset=utf-8',
+    }
+    recursos = {}
+    for ruta in sorted(DIRECTORIO_ESTATICO.rglob('*')):
+        if not ruta.is_file() or ruta.suffix not in tipos:
+            continue
+        recurso = precodificar_recurso(ruta.read_bytes(), tipos[ruta.suffix])
+        nombre = f"{ruta.stem}.{recurso['huella']}{ruta.suffix}"
+        recurso['original'] = ruta.name
+        recursos[nombre] = recurso
+    return recursos
+
+def construir_pagina_inicial(recursos):
+    """
+    Renderiza la página inicial enlazando los recursos con huella digital
+    Parámetros: recursos - Diccionario devuelto por cargar_recursos_estaticos
+    Retorna: Recurso precodificado con el HTML de la página
+    """
+    urls = {r['original']: f"/static/{nombre}" for nombre, r in recursos.items()}
+    html = (PAGINA_INICIAL_HTML
+            .replace('__CSS_URL__', urls.get('estilos.css', ''))
+            .replace('__JS_URL__', urls.get('chatbot.js', '')))
+    return precodificar_recurso(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+def acepta_gzip(accept_encoding):
+    """
+    Indica si la cabecera Accept-Encoding admite gzip (respetando q=0)
+    Parámetros: accept_encoding - Valor de la cabecera (puede estar vacío)
+    Retorna: True si gzip (o *) aparece con calidad mayor que cero
+    """
+    calidades = {}
+    for parte in accept_encoding.split(','):
+        codificacion, _, parametros = parte.partition(';')
+        codificacion = codificacion.strip().lower()
+        if not codificacion:
+            continue
+        calidad = 1.0
+        parametro, _, valor = parametros.partition('=')
+        if parametro.strip().lower() == 'q':
+            try:
+                calidad = float(valor)
+            except ValueError:
+                calidad = 0.0
+        calidades[codificacion] = calidad
+    return calidades.get('gzip', calidades.get('*', 0.0)) > 0
+
+def respuesta_precodificada(request, recurso, cache_control):
+    """
+    Construye la respuesta para un recurso precodificado respetando
+    If-None-Match y Accept-Encoding
+    Parámetros:
+        request - Petición entrante
+        recurso - Recurso devuelto por precodificar_recurso
+        cache_control - Valor de la cabecera Cache-Control
+    Retorna: Response lista para enviar (200 o 304)
+    """
+    # Primero se elige la representación: el ETag depende de la codificación
+    comprimir = recurso['gzip'] is not None and acepta_gzip(request.headers.get('accept-encoding', ''))
+    etag = recurso['etag_gzip'] if comprimir else recurso['etag']
+    cabeceras = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding',
+    }
+
+    etags_cliente = request.headers.get('if-none-match', '')
+    if etags_cliente and (etags_cliente.strip() == '*' or etag in
+                          [e.strip().removeprefix('W/') for e in etags_cliente.split(',')]):
+        return Response(status_code=304, headers=cabeceras)
+
+    contenido = recurso['contenido']
+    if comprimir:
+        contenido = recurso['gzip']
+        cabeceras['Content-Encoding'] = 'gzip'
+
+    return Response(content=contenido, media_type=recurso['tipo'], headers=cabeceras)
+
+# Precodificar recursos y página inicial una sola vez al importar el módulo
+recursos_estaticos = cargar_recursos_estaticos()
+pagina_inicial = construir_pagina_inicial(recursos_estaticos)
+
+# ========================================
+# COLUMNAS TIPADAS Y FILTROS POR RANGO
+# ========================================
+
+def convertir_columnas_tipadas(df):
+    """
+    Convierte date_added y duration en columnas tipadas
+    Parámetros: df - DataFrame de Netflix
+    Retorna: DataFrame con fecha_agregado (datetime), minutos y temporadas (float, NaN si no aplica)
+    """
+    fechas = pd.to_datetime(df['date_added'].astype(object).str.strip(), format='%B %d, %Y', errors='coerce')
+
+    # Algunas películas tienen la duración en la columna rating ("74 min")
+    rating = df['rating'].astype(object)
+    duracion = df['duration'].astype(object).fillna(rating.where(rating.str.contains('min', na=False)))
+    partes = duracion.str.extract(r'(\d+)\s*(min|Season)')
+    cantidad = pd.to_numeric(partes[0], errors='coerce')
+
+    return pd.DataFrame({
+        'fecha_agregado': fechas,
+        'minutos': cantidad.where(partes[1] == 'min'),
+        'temporadas': cantidad.where(partes[1] == 'Season'),
+    }, index=df.index)
+
+def construir_indice_rangos(df):
+    """
+    Construye un índice ordenado por cada columna tipada para responder
+    filtros por rango con búsqueda binaria
+    Parámetros: df - DataFrame de Netflix
+    Retorna: Diccionario columna -> (valores ordenados, posiciones de fila)
+    """
+    columnas = convertir_columnas_tipadas(df)
+    indice = {'columnas': columnas, 'ordenados': {}}
+    for columna in columnas.columns:
+        valores = columnas[columna].to_numpy()
+        validas = np.flatnonzero(columnas[columna].notna().to_numpy())
+        orden = validas[np.argsort(valores[validas], kind='stable')]
+        indice['ordenados'][columna] = (valores[orden], orden)
+    return indice
+
+def posiciones_en_rango(indice, columna, minimo=None, maximo=None):
+    """
+    Obtiene las posiciones de fila cuyo valor está en [minimo, maximo]
+    Parámetros:
+        indice - Índice devuelto por construir_indice_rangos
+        columna - fecha_agregado, minutos o temporadas
+        minimo, maximo - Límites inclusivos (None para no limitar)
+    Retorna: Arreglo ordenado de posiciones de fila
+    """
+    valores, orden = indice['ordenados'][columna]
+    inicio = 0 if minimo is None else np.searchsorted(valores, minimo, side='left')
+    fin = len(valores) if maximo is None else np.searchsorted(valores, maximo, side='right')
+    return np.sort(orden[inicio:fin])
+
+async def parametros_rango(
+    agregado_desde: Optional[date] = None,
+    agregado_hasta: Optional[date] = None,
+    minutos_min: Optional[int] = None,
+    minutos_max: Optional[int] = None,
+    temporadas_min: Optional[int] = None,
+    temporadas_max: Optional[int] = None,
+):
+    """
+    Parámetros de consulta compartidos para filtrar por fecha de agregado
+    (AAAA-MM-DD) y por duración en minutos o temporadas
+    """
+    return {
+        'fecha_agregado': (
+            None if agregado_desde is None else np.datetime64(agregado_desde, 'ns'),
+            None if agregado_hasta is None else np.datetime64(agregado_hasta, 'ns'),
+        ),
+        'minutos': (minutos_min, minutos_max),
+        'temporadas': (temporadas_min, temporadas_max),
+    }
+
+def filtrar_por_rangos(catalogo, rangos):
+    """
+    Intersecta los filtros por rango solicitados
+    Parámetros:
+        catalogo - Catalogo a filtrar
+        rangos - Diccionario devuelto por parametros_rango
+    Retorna: Arreglo ordenado de posiciones de fila, o None si no hay filtros
+    """
+    posiciones = None
+    for columna, (minimo, maximo) in rangos.items():
+        if minimo is None and maximo is None:
+            continue
+        en_rango = posiciones_en_rango(catalogo.rangos, columna, minimo, maximo)
+        posiciones = en_rango if posiciones is None else np.intersect1d(posiciones, en_rango, assume_unique=True)
+    return posiciones
+
+def mascara_por_rangos(catalogo, rangos):
+    """
+    Convierte los filtros por rango en una máscara booleana por posición de fila
+    Parámetros:
+        catalogo - Catalogo a filtrar
+        rangos - Diccionario devuelto por parametros_rango
+    Retorna: Arreglo booleano, o None si no hay filtros
+    """
+    posiciones = filtrar_por_rangos(catalogo, rangos)
+    if posiciones is None:
+        return None
+    mascara = np.zeros(len(catalogo), dtype=bool)
+    mascara[posiciones] = True
+    return mascara
+
+# ========================================
+# ETAPA 6: RUTAS DE LA API
+# ========================================
+
+@app.get("/", response_class=HTMLResponse)
+def ruta_inicial(request: Request):
+    """
+    Ruta inicial: Interfaz del chatbot para buscar películas por descripción
+    La página se renderiza y comprime una sola vez al iniciar
+    """
+    return respuesta_precodificada(request, pagina_inicial, CACHE_PAGINA_INICIAL)
+
+@app.get("/static/{nombre}")
+def recurso_estatico(nombre: str, request: Request):
+    """
+    Ruta para servir las hojas de estilo y scripts con huella digital
+    Parámetros: nombre - Nombre publicado del recurso (incluye la huella)
+    """
+    recurso = recursos_estaticos.get(nombre)
+    if recurso is None:
+        raise HTTPException(status_code=404, detail=f"No se encontró el recurso: {nombre}")
+    return respuesta_precodificada(request, recurso, CACHE_RECURSOS_ESTATICOS)
+
+@app.get("/peliculas", response_class=JSONResponse)
+def lista_peliculas(
+    rangos: dict = Depends(parametros_rango),
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener la lista de todas las películas disponibles en el dataset
+    Parámetros opcionales: catalogo, fields, agregado_desde, agregado_hasta,
+    minutos_min, minutos_max, temporadas_min, temporadas_max
+    Ejemplo: /peliculas?minutos_max=100&agregado_desde=2021-01-01&agregado_hasta=2021-12-31
+    Ejemplo: /peliculas?fields=show_id,title
+    """
+    try:
+        # Aplicar los filtros por rango con búsqueda binaria sobre los índices ordenados
+        posiciones = filtrar_por_rangos(catalogo, rangos)
+        total = len(catalogo) if posiciones is None else len(posiciones)
+        seleccion = slice(0, 100) if posiciones is None else posiciones[:100]
+
+        # Codificar solo las filas y columnas a mostrar (valores nulos como cadenas vacías)
+        peliculas = filas_json(catalogo, seleccion, campos)
+        
+        # Retornar solo los primeros 100 resultados para evitar tiempos de carga
+        return respuesta_json(json_con_filas({
+            "total": total,
+            "total_en_respuesta": len(peliculas[:100]),
+            "mensaje": "Mostrando primeros 100 resultados",
+        }, peliculas[:100]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener películas: {str(e)}")
+
+@app.get("/peliculas/{id}", response_class=JSONResponse)
+def pelicula_por_id(
+    id: str,
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener una película específica según su ID
+    Parámetros: id - ID de la película a buscar
+    Admite fields= para devolver solo algunas columnas
+    """
+    try:
+        # Buscar la película por su ID en el índice show_id -> fila
+        posiciones = posiciones_de_ids(catalogo, [id])
+        
+        if posiciones[0] < 0:
+            raise HTTPException(status_code=404, detail=f"No se encontró película con ID: {id}")
+        
+        # Codificar la fila con los fragmentos precodificados (nulos como cadenas vacías)
+        return respuesta_json(filas_json(catalogo, posiciones, campos)[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar película: {str(e)}")
+
+# Máximo de ids por petición de /peliculas/lote
+LIMITE_LOTE = 5000
+
+class SolicitudLote(BaseModel):
+    """
+    Cuerpo de /peliculas/lote: lista de show_id en el orden en que se quieren
+    """
+    ids: List[str]
+
+@app.post("/peliculas/lote", response_class=JSONResponse)
+def peliculas_por_lote(
+    solicitud: SolicitudLote,
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener varias películas por ID en una sola petición
+    Parámetros: cuerpo JSON {"ids": ["s1", "s2", ...]} (hasta LIMITE_LOTE ids)
+    Las películas vuelven en el orden pedido, con null en el lugar de los ids
+    que no existen, que además se listan en faltantes. Admite fields=
+    Ejemplo: POST /peliculas/lote?fields=show_id,title {"ids": ["s1", "s25", "s9999"]}
+    """
+    ids = solicitud.ids
+    if len(ids) > LIMITE_LOTE:
+        raise HTTPException(status_code=400, detail=f"Se admiten como máximo {LIMITE_LOTE} ids por lote")
+    try:
+        posiciones = posiciones_de_ids(catalogo, ids)
+        encontradas = posiciones >= 0
+
+        # Codificar solo las filas encontradas y ubicarlas en el orden pedido
+        filas = iter(filas_json(catalogo, posiciones[encontradas], campos))
+        peliculas = [next(filas) if encontrada else b'null' for encontrada in encontradas.tolist()]
+        faltantes = [id for id, encontrada in zip(ids, encontradas.tolist()) if not encontrada]
+        return respuesta_json(json_con_filas({
+            "total": len(ids),
+            "encontradas": len(ids) - len(faltantes),
+            "faltantes": faltantes,
+        }, peliculas))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar películas por lote: {str(e)}")
+
+@app.get("/peliculas/categoria/{categoria}", response_class=JSONResponse)
+def peliculas_por_categoria(
+    categoria: str,
+    rangos: dict = Depends(parametros_rango),
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener lista de películas según la categoría solicitada por el usuario
+    Parámetros: categoria - Categoría a filtrar (por ejemplo: "Dramas", "Comedies", etc.)
+    Admite los mismos filtros por rango y fields= que /peliculas
+    """
+    try:
+        # Buscar películas cuya columna 'listed_in' contenga la categoría especificada
+        filtro = catalogo.df['listed_in'].str.contains(categoria, case=False, na=False).to_numpy()
+        mascara = mascara_por_rangos(catalogo, rangos)
+        if mascara is not None:
+            filtro = filtro & mascara
+        posiciones = np.flatnonzero(filtro)
+        
+        if len(posiciones) == 0:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"No se encontraron películas en la categoría: {categoria}"
+            )
+        
+        # Codificar las filas con los fragmentos precodificados (nulos como cadenas vacías)
+        peliculas_list = filas_json(catalogo, posiciones, campos)
+        
+        return respuesta_json(json_con_filas({
+            "categoria": categoria,
+            "total": len(peliculas_list),
+        }, peliculas_list))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al filtrar por categoría: {str(e)}")
+
+# ========================================
+# CONTROL DE ADMISIÓN PARA BÚSQUEDAS COSTOSAS
+# ========================================
+
+class ControlAdmision:
+    """
+    Limita las peticiones en curso de una ruta costosa y mantiene una cola de
+    espera acotada. Las peticiones que no caben en la cola (429) o que no
+    alcanzarían a empezar dentro del plazo (503) se rechazan de inmediato con
+    Retry-After, para que la sobrecarga solo afecte a esta ruta.
+    Se usa como `async with control:` desde rutas async, todo en el bucle de eventos.
+    """
+
+    def __init__(self, nombre, max_en_curso, max_en_cola, espera_maxima):
+        self.nombre = nombre
+        self.max_en_curso = max(1, max_en_curso)
+        self.max_en_cola = max(0, max_en_cola)
+        self.espera_maxima = espera_maxima
+        self.en_curso = 0
+        self.cola = deque()
+        # Tiempo de servicio promedio (media móvil exponencial) para estimar esperas
+        self.tiempo_servicio = 0.05
+        self.admitidas = 0
+        self.encoladas = 0
+        self.rechazadas_cola_llena = 0
+        self.rechazadas_por_plazo = 0
+        self.max_cola_observada = 0
+
+    def espera_estimada(self, posicion):
+        """
+        Estima cuántos segundos esperaría una petición en la posición indicada de la cola
+        """
+        return (posicion + 1) * self.tiempo_servicio / self.max_en_curso
+
+    def rechazar(self, codigo, espera):
+        """
+        Lanza la respuesta de rechazo con la cabecera Retry-After
+        """
+        raise HTTPException(
+            status_code=codigo,
+            detail=f"Servicio de búsqueda saturado ({self.nombre}), intente de nuevo más tarde",
+            headers={"Retry-After": str(max(1, math.ceil(espera)))}
+        )
+
+    async def __aenter__(self):
+        if self.en_curso < self.max_en_curso and not self.cola:
+            self.en_curso += 1
+            self.admitidas += 1
+            return self
+
+        posicion = len(self.cola)
+        espera = self.espera_estimada(posicion)
+        if posicion >= self.max_en_cola:
+            self.rechazadas_cola_llena += 1
+            self.rechazar(429, espera)
+        if espera > self.espera_maxima:
+            self.rechazadas_por_plazo += 1
+            self.rechazar(503, espera)
+
+        turno = asyncio.get_running_loop().create_future()
+        self.cola.append(turno)
+        self.encoladas += 1
+        self.max_cola_observada = max(self.max_cola_observada, len(self.cola))
+        esperado = False
+        try:
+            await asyncio.wait({turno}, timeout=self.espera_maxima)
+            esperado = True
+        finally:
+            if not turno.done():
+                # Plazo vencido (o cliente desconectado): salir de la cola sin ocupar cupo
+                turno.cancel()
+                self.cola.remove(turno)
+            elif not esperado and not turno.cancelled():
+                # Se recibió el cupo pero la espera se canceló antes de usarlo:
+                # __aexit__ no va a ejecutarse, así que se cede aquí
+                self.liberar()
+        if turno.cancelled():
+            self.rechazadas_por_plazo += 1
+            self.rechazar(503, self.espera_estimada(len(self.cola)))
+
+        # El cupo lo transfirió la petición que terminó (ver __aexit__)
+        self.admitidas += 1
+        return self
+
+    async def __aexit__(self, tipo, valor, traza):
+        self.liberar()
+        return False
+
+    def liberar(self):
+        """
+        Cede el cupo a la siguiente petición en espera o, si no hay, lo devuelve
+        """
+        while self.cola:
+            turno = self.cola.popleft()
+            if not turno.done():
+                turno.set_result(True)
+                return
+        self.en_curso -= 1
+
+    def registrar_servicio(self, segundos):
+        """
+        Actualiza el tiempo de servicio promedio con una petición terminada
+        """
+        self.tiempo_servicio = 0.8 * self.tiempo_servicio + 0.2 * segundos
+
+    async def ejecutar(self, funcion, *args):
+        """
+        Ejecuta una función bloqueante en el pool de hilos una vez admitida la petición
+        """
+        async with self:
+            inicio = time.perf_counter()
+            try:
+                return await run_in_threadpool(funcion, *args)
+            finally:
+                self.registrar_servicio(time.perf_counter() - inicio)
+
+    def metricas(self):
+        """
+        Retorna: Diccionario con la configuración, la cola actual y los contadores
+        """
+        return {
+            "max_en_curso": self.max_en_curso,
+            "max_en_cola": self.max_en_cola,
+            "espera_maxima_segundos": self.espera_maxima,
+            "en_curso": self.en_curso,
+            "en_cola": len(self.cola),
+            "max_cola_observada": self.max_cola_observada,
+            "tiempo_servicio_promedio_segundos": round(self.tiempo_servicio, 4),
+            "admitidas": self.admitidas,
+            "encoladas": self.encoladas,
+            "rechazadas_cola_llena": self.rechazadas_cola_llena,
+            "rechazadas_por_plazo": self.rechazadas_por_plazo,
+        }
+
+def crear_control_admision(nombre, max_en_curso, max_en_cola, espera_maxima):
+    """
+    Crea un control de admisión leyendo la configuración de variables de entorno
+    (por ejemplo: ADMISION_DESCRIPCION_MAX_EN_CURSO, ADMISION_DESCRIPCION_MAX_EN_COLA,
+    ADMISION_DESCRIPCION_ESPERA_MAXIMA) con los valores indicados por defecto
+    """
+    prefijo = f"ADMISION_{nombre.upper()}_"
+    return ControlAdmision(
+        nombre,
+        int(os.environ.get(prefijo + "MAX_EN_CURSO", max_en_curso)),
+        int(os.environ.get(prefijo + "MAX_EN_COLA", max_en_cola)),
+        float(os.environ.get(prefijo + "ESPERA_MAXIMA", espera_maxima)),
+    )
+
+# Un control por cada ruta costosa
+controles_admision = {
+    'descripcion': crear_control_admision('descripcion', max_en_curso=4, max_en_cola=32, espera_maxima=2.0),
+}
+
+@app.get("/admin/admision", response_class=JSONResponse)
+async def metricas_admision():
+    """
+    Ruta para consultar la profundidad de cola y los rechazos de cada control de admisión
+    """
+    return JSONResponse(content={
+        nombre: control.metricas() for nombre, control in controles_admision.items()
+    })
+
+# ========================================
+# CACHÉ LRU DE RESULTADOS DE BÚSQUEDA
+# ========================================
+
+class CacheLRU:
+    """
+    Caché acotada por número de entradas y por tiempo de vida (TTL), con
+    expulsión de la entrada menos usada recientemente. Es segura entre hilos
+    porque las búsquedas se ejecutan en el pool de hilos. Las entradas fijadas
+    (pocas y conocidas de antemano) no vencen ni se expulsan.
+    """
+
+    def __init__(self, nombre, max_entradas, ttl_segundos):
+        self.nombre = nombre
+        self.max_entradas = max(1, max_entradas)
+        self.ttl = ttl_segundos
+        self.entradas = OrderedDict()
+        self.fijas = {}
+        self.candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expiraciones = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave):
+        """
+        Retorna: El valor guardado para la clave, o None si no está o expiró
+        """
+        with self.candado:
+            if clave in self.fijas:
+                self.aciertos += 1
+                return self.fijas[clave]
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            vence, valor = entrada
+            if vence < time.monotonic():
+                del self.entradas[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un valor y expulsa las entradas menos usadas si se supera el tamaño
+        """
+        with self.candado:
+            self.entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def fijar(self, clave, valor):
+        """
+        Guarda un valor que no vence ni se expulsa (hasta que se limpie su catálogo)
+        """
+        with self.candado:
+            self.entradas.pop(clave, None)
+            self.fijas[clave] = valor
+
+    def limpiar(self, catalogo=None):
+        """
+        Elimina las entradas de un catálogo (por ejemplo: al publicar un nuevo snapshot)
+        Parámetros: catalogo - Id del catálogo (primer elemento de la clave); None para todas
+        """
+        with self.candado:
+            if catalogo is None:
+                self.invalidaciones += len(self.entradas) + len(self.fijas)
+                self.entradas.clear()
+                self.fijas.clear()
+                return
+            for entradas in (self.entradas, self.fijas):
+                for clave in [c for c in entradas if c[0] == catalogo]:
+                    del entradas[clave]
+                    self.invalidaciones += 1
+
+    def metricas(self):
+        """
+        Retorna: Diccionario con la configuración, el tamaño actual y los contadores
+        """
+        with self.candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "entradas": len(self.entradas),
+                "fijas": len(self.fijas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "expulsiones": self.expulsiones,
+                "expiraciones": self.expiraciones,
+                "invalidaciones": self.invalidaciones,
+            }
+
+# Ranking (posiciones de fila) por conjunto normalizado de palabras y versión del snapshot
+cache_busquedas = CacheLRU(
+    'busquedas',
+    int(os.environ.get("CACHE_BUSQUEDAS_MAX_ENTRADAS", 512)),
+    float(os.environ.get("CACHE_BUSQUEDAS_TTL", 300)),
+)
+
+# Posiciones ya rankeadas y filtradas por rango de cada búsqueda, para servir
+# las páginas siguientes con un corte y la serialización de esa página
+cache_resultados = CacheLRU(
+    'resultados',
+    int(os.environ.get("CACHE_RESULTADOS_MAX_ENTRADAS", 256)),
+    float(os.environ.get("CACHE_RESULTADOS_TTL", 120)),
+)
+
+@app.get("/admin/cache", response_class=JSONResponse)
+async def metricas_cache():
+    """
+    Ruta para consultar aciertos, fallos y expulsiones de las cachés de búsquedas
+    """
+    with registro_catalogos.candado:
+        catalogos = {id: c.version for id, c in registro_catalogos.cargados.items()}
+    return JSONResponse(content={
+        "catalogos": catalogos,
+        cache_busquedas.nombre: cache_busquedas.metricas(),
+        cache_resultados.nombre: cache_resultados.metricas()
+    })
+
+# ========================================
+# COALESCENCIA DE BÚSQUEDAS IDÉNTICAS
+# ========================================
+
+class VueloUnico:
+    """
+    Deduplica cálculos concurrentes: mientras una búsqueda con cierta clave
+    está en curso, las peticiones con la misma clave esperan ese mismo
+    cálculo y comparten su resultado (o su error) en lugar de repetirlo.
+    Se usa desde rutas async, todo en el bucle de eventos.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.en_vuelo = {}
+        self.calculos = 0
+        self.coalescidas = 0
+        self.max_esperando = 0
+        self.esperando = Counter()
+
+    async def ejecutar(self, clave, crear_corrutina):
+        """
+        Ejecuta crear_corrutina() una sola vez por clave entre peticiones concurrentes
+        Parámetros:
+            clave - Clave hashable que identifica el cálculo
+            crear_corrutina - Función sin argumentos que devuelve la corrutina a ejecutar
+        Retorna: El resultado del cálculo compartido
+        """
+        tarea = self.en_vuelo.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(crear_corrutina())
+            self.en_vuelo[clave] = tarea
+            self.calculos += 1
+            tarea.add_done_callback(lambda t: self.terminar(clave, t))
+        else:
+            self.coalescidas += 1
+            self.esperando[clave] += 1
+            self.max_esperando = max(self.max_esperando, self.esperando[clave])
+
+        # shield: si un cliente se desconecta, el cálculo sigue para los demás
+        return await asyncio.shield(tarea)
+
+    def terminar(self, clave, tarea):
+        """
+        Retira la tarea terminada para que la siguiente petición calcule de nuevo
+        """
+        if self.en_vuelo.get(clave) is tarea:
+            del self.en_vuelo[clave]
+        self.esperando.pop(clave, None)
+        # Marcar el error como recuperado aunque ninguna petición siga esperando
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def metricas(self):
+        """
+        Retorna: Diccionario con los cálculos realizados y las peticiones coalescidas
+        """
+        peticiones = self.calculos + self.coalescidas
+        return {
+            "en_vuelo": len(self.en_vuelo),
+            "calculos": self.calculos,
+            "coalescidas": self.coalescidas,
+            "tasa_coalescencia": round(self.coalescidas / peticiones, 4) if peticiones else 0.0,
+            "max_esperando_por_calculo": self.max_esperando,
+        }
+
+# Búsquedas por descripción en curso, por consulta normalizada y filtros
+vuelos_busqueda = VueloUnico('busquedas')
+
+@app.get("/admin/coalescencia", response_class=JSONResponse)
+async def metricas_coalescencia():
+    """
+    Ruta para consultar cuántas búsquedas idénticas se resolvieron con un solo cálculo
+    """
+    return JSONResponse(content={vuelos_busqueda.nombre: vuelos_busqueda.metricas()})
+
+# ========================================
+# REGISTRO DE CONSULTAS LENTAS Y EXPLICACIÓN DE BÚSQUEDAS
+# ========================================
+
+# Archivo JSON-lines donde se registran las búsquedas que superan el umbral
+RUTA_LOG_CONSULTAS_LENTAS = Path(os.environ.get(
+    "RUTA_LOG_CONSULTAS_LENTAS", Path(__file__).resolve().parent / 'consultas_lentas.jsonl'
+))
+
+# Milisegundos a partir de los cuales una búsqueda se considera lenta
+UMBRAL_CONSULTA_LENTA_MS = float(os.environ.get("UMBRAL_CONSULTA_LENTA_MS", 500))
+
+# Las escrituras llegan desde varios hilos del pool
+candado_log_consultas = threading.Lock()
+
+def nueva_traza():
+    """
+    Retorna: Traza vacía con los contadores de trabajo de una búsqueda
+    """
+    return {'etapas_ms': {}, 'cache_ranking': None, 'documentos_puntuados': 0}
+
+def marcar_etapa(traza, etapa, inicio):
+    """
+    Anota en la traza los milisegundos transcurridos desde inicio
+    Retorna: El instante actual, para encadenar la siguiente etapa
+    """
+    ahora = time.perf_counter()
+    if traza is not None:
+        traza['etapas_ms'][etapa] = round((ahora - inicio) * 1000, 3)
+    return ahora
+
+def registrar_consulta_lenta(entrada):
+    """
+    Agrega una búsqueda lenta al archivo JSON-lines (una línea por consulta)
+    Parámetros: entrada - Diccionario serializable con la consulta y su traza
+    """
+    linea = json.dumps(entrada, ensure_ascii=False, default=str) + '\n'
+    try:
+        with candado_log_consultas, open(RUTA_LOG_CONSULTAS_LENTAS, 'a', encoding='utf-8') as archivo:
+            archivo.write(linea)
+    except Exception as e:
+        print(f"⚠️ No se pudo registrar la consulta lenta: {e}")
+
+# ========================================
+# ETAPA 7: RUTA DEL CHATBOT - FILTRO POR DESCRIPCIÓN
+# ========================================
+
+# Importar stopwords para filtrar palabras comunes
+from nltk.corpus import stopwords
+
+# Obtener lista de stopwords en inglés
+try:
+    stop_words = set(stopwords.words('english'))
+except:
+    stop_words = set()
+
+# Tokenizador de respaldo si faltan los datos de punkt de NLTK
+PATRON_TOKENS = re.compile(r"\w+|[^\w\s]")
+tokenizador_respaldo = False
+
+def tokenizar_texto(texto):
+    """
+    Tokeniza un texto con NLTK o, si faltan sus datos, con una expresión regular
+    Parámetros: texto - Texto a tokenizar
+    Retorna: Lista de tokens
+    """
+    global tokenizador_respaldo
+    if not tokenizador_respaldo:
+        try:
+            return word_tokenize(texto)
+        except LookupError:
+            print("⚠️ Advertencia NLTK: punkt no disponible, se usa el tokenizador de respaldo")
+            tokenizador_respaldo = True
+    return PATRON_TOKENS.findall(texto)
+
+def rankear_descripcion(descripcion_usuario, catalogo, traza=None):
+    """
+    Obtiene el ranking de películas para una consulta, usando la caché
+    Parámetros:
+        descripcion_usuario - Descripción o palabras clave del usuario
+        catalogo - Catalogo sobre el que se busca
+        traza - Traza donde anotar etapas y contadores (opcional)
+    Retorna: array('i') de posiciones de fila ordenadas por relevancia
+    """
+    # Analizar la consulta (las palabras se limpian igual que las descripciones)
+    inicio = time.perf_counter()
+    arbol, clave_consulta = normalizar_consulta(descripcion_usuario, catalogo)
+    inicio = marcar_etapa(traza, 'analisis', inicio)
+    
+    if arbol is None:
+        return array('i')
+    
+    # El ranking se guarda en caché por catálogo, snapshot y consulta
+    # canónica (el orden y las stopwords no generan entradas distintas).
+    # Solo se guardan las posiciones: 4 bytes por resultado en lugar de un diccionario
+    clave = (catalogo.id, catalogo.version, clave_consulta)
+    posiciones = cache_busquedas.obtener(clave)
+    marcar_etapa(traza, 'cache', inicio)
+    if traza is not None:
+        traza['cache_ranking'] = 'fallo' if posiciones is None else 'acierto'
+    if posiciones is None:
+        ranking = rankear_consulta(arbol, catalogo.textual, catalogo.df, traza)
+        posiciones = array('i', [p['posicion'] for p in ranking])
+        cache_busquedas.guardar(clave, posiciones)
+    return posiciones
+
+# Tamaño de página por defecto y máximo de la búsqueda por descripción
+LIMITE_PAGINA_DESCRIPCION = 50
+LIMITE_PAGINA_MAXIMO = 500
+
+def huella_busqueda(clave):
+    """
+    Retorna: Huella corta de una búsqueda (consulta normalizada y filtros) para los cursores
+    """
+    return hashlib.sha256(repr(clave).encode('utf-8')).hexdigest()[:12]
+
+def codificar_cursor(version, desplazamiento, huella):
+    """
+    Crea el cursor opaco de la página siguiente
+    Parámetros:
+        version - Versión del snapshot sobre el que se rankeó
+        desplazamiento - Posición del primer resultado de la página
+        huella - Huella de la búsqueda (ver huella_busqueda)
+    """
+    return base64.urlsafe_b64encode(f"{version}:{desplazamiento}:{huella}".encode('ascii')).decode('ascii')
+
+def decodificar_cursor(cursor):
+    """
+    Lee un cursor creado por codificar_cursor
+    Retorna: Tupla (version, desplazamiento, huella)
+    """
+    try:
+        version, desplazamiento, huella = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+        version, desplazamiento = int(version), int(desplazamiento)
+    except Exception:
+        raise ValueError("Cursor no válido")
+    if desplazamiento < 0:
+        raise ValueError("Cursor no válido")
+    return version, desplazamiento, huella
+
+@app.get("/peliculas/descripcion/{descripcion}", response_class=JSONResponse)
+async def peliculas_por_descripcion(
+    descripcion: str,
+    limit: int = LIMITE_PAGINA_DESCRIPCION,
+    cursor: Optional[str] = None,
+    explain: bool = False,
+    corregir: bool = True,
+    rangos: dict = Depends(parametros_rango),
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta del chatbot para obtener lista de películas que coinciden con la descripción del usuario
+    Parámetros: descripcion - Descripción o palabras clave que el usuario busca
+    Admite AND, OR, NOT, frases entre comillas, prefijos de campo y los mismos
+    filtros por rango que /peliculas. Los resultados se paginan con limit y
+    con el cursor devuelto en siguiente_cursor. Con explain=true la respuesta
+    incluye el plan de la consulta, los candidatos por término y el tiempo de cada etapa.
+    Las palabras que no existen en el catálogo se corrigen (corregir=false lo desactiva)
+    y la respuesta indica la consulta corregida
+    Ejemplo: /peliculas/descripcion/action adventure hero?minutos_max=100
+    Ejemplo: /peliculas/descripcion/detectve mistery
+    Ejemplo: /peliculas/descripcion/"serial killer" NOT genre:comedies?explain=true
+    Ejemplo: /peliculas/descripcion/love?limit=20&cursor=<siguiente_cursor>
+    Ejemplo: /peliculas/descripcion/love?fields=show_id,title
+    """
+    inicio = time.perf_counter()
+    if len(descripcion) > LARGO_MAXIMO_CONSULTA:
+        raise HTTPException(status_code=400, detail=f"La consulta no puede superar {LARGO_MAXIMO_CONSULTA} caracteres")
+    if not 1 <= limit <= LIMITE_PAGINA_MAXIMO:
+        raise HTTPException(status_code=400, detail=f"limit debe estar entre 1 y {LIMITE_PAGINA_MAXIMO}")
+
+    # El cursor solo es válido para la misma búsqueda sobre el mismo snapshot.
+    # La corrección y el análisis se hacen en el pool después de la admisión:
+    # la búsqueda se identifica aquí por el texto tal como llega
+    clave_busqueda = (catalogo.id, catalogo.version, descripcion, corregir, tuple(rangos.values()))
+    huella = huella_busqueda(clave_busqueda[2:])
+    desplazamiento = 0
+    if cursor is not None:
+        try:
+            version_cursor, desplazamiento, huella_cursor = decodificar_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if huella_cursor != huella:
+            raise HTTPException(status_code=400, detail="El cursor pertenece a otra búsqueda")
+        if version_cursor != catalogo.version:
+            raise HTTPException(status_code=410, detail="El catálogo cambió desde la primera página; repita la búsqueda")
+
+    # Las peticiones concurrentes con la misma consulta, los mismos filtros y la
+    # misma página comparten un solo cálculo, que pasa por el control de
+    # admisión antes de ocupar un hilo del pool
+    clave = (clave_busqueda, desplazamiento, limit, campos, explain)
+    coalescida = clave in vuelos_busqueda.en_vuelo
+    encolada = time.perf_counter()
+    peliculas_limpias, total, traza, (consulta, correcciones, clave_resultados) = await vuelos_busqueda.ejecutar(
+        clave,
+        lambda: controles_admision['descripcion'].ejecutar(
+            calcular_busqueda_descripcion, catalogo, descripcion, rangos,
+            explain, encolada, corregir, desplazamiento, limit, campos
+        )
+    )
+
+    # La traza del cálculo es compartida: se completa con los datos de esta petición
+    explicacion = {
+        **traza,
+        'etapas_ms': {**traza['etapas_ms'], 'total': round((time.perf_counter() - inicio) * 1000, 3)},
+        'coalescida': coalescida,
+        'resultados': total,
+    }
+    if explicacion['etapas_ms']['total'] >= UMBRAL_CONSULTA_LENTA_MS:
+        await run_in_threadpool(registrar_consulta_lenta, {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'catalogo': catalogo.id,
+            'version': catalogo.version,
+            'consulta': descripcion,
+            'consulta_corregida': consulta if correcciones else None,
+            'consulta_normalizada': clave_resultados[2],
+            'rangos': {columna: list(par) for columna, par in rangos.items() if par != (None, None)},
+            **explicacion,
+        })
+
+    if not total:
+        mensaje = f"No se encontraron películas que coincidan con: {consulta}"
+        raise HTTPException(
+            status_code=404, 
+            detail={"mensaje": mensaje, "explicacion": explicacion} if explain else mensaje
+        )
+
+    siguiente = desplazamiento + limit
+    respuesta = {"busqueda": descripcion}
+    if correcciones:
+        respuesta["consulta_corregida"] = consulta
+        respuesta["correcciones"] = correcciones
+    respuesta.update({
+        "total": total,
+        "limite": limit,
+        "siguiente_cursor": codificar_cursor(catalogo.version, siguiente, huella) if siguiente < total else None,
+        "peliculas": None
+    })
+    if explain:
+        respuesta["explicacion"] = explicacion
+    return respuesta_json(json_con_filas(respuesta, peliculas_limpias))
+
+def preparar_consulta(catalogo, descripcion, rangos, corregir=True, traza=None):
+    """
+    Corrige la consulta (si se pide) y obtiene la clave de su caché de posiciones;
+    se ejecuta en el pool de hilos, después del control de admisión
+    Parámetros:
+        catalogo, descripcion, rangos - Búsqueda a preparar
+        corregir - Si es True, se corrigen las palabras que no están en el catálogo
+        traza - Traza donde anotar la etapa de corrección (opcional)
+    Retorna: Tupla (consulta corregida, correcciones aplicadas, clave de resultados)
+    Lanza: ErrorConsulta si la consulta no es válida
+    """
+    inicio = time.perf_counter()
+    consulta, correcciones = corregir_consulta(descripcion, catalogo) if corregir else (descripcion, [])
+    marcar_etapa(traza, 'correccion', inicio)
+    _, clave_consulta = normalizar_consulta(consulta, catalogo)
+    return consulta, correcciones, (catalogo.id, catalogo.version, clave_consulta, tuple(rangos.values()))
+
+def resolver_busqueda(catalogo, descripcion, rangos, corregir=True):
+    """
+    Prepara la consulta y obtiene sus posiciones (usando la caché de posiciones)
+    Retorna: Tupla (posiciones, consulta corregida, correcciones aplicadas)
+    Lanza: ErrorConsulta si la consulta no es válida
+    """
+    consulta, correcciones, clave_resultados = preparar_consulta(catalogo, descripcion, rangos, corregir)
+    return posiciones_busqueda(catalogo, consulta, rangos, None, clave_resultados), consulta, correcciones
+
+def posiciones_busqueda(catalogo, descripcion, rangos, traza=None, clave_resultados=None):
+    """
+    Rankea la búsqueda y conserva solo las posiciones que cumplen los filtros por rango
+    Parámetros:
+        catalogo, descripcion, rangos - Búsqueda a resolver
+        traza - Traza donde anotar etapas y contadores (opcional)
+        clave_resultados - Clave de la caché de posiciones (None para no usarla)
+    Retorna: array('i') de posiciones de fila ordenadas por relevancia
+    """
+    # Las páginas siguientes reutilizan las posiciones ya rankeadas y filtradas
+    if clave_resultados is not None:
+        posiciones = cache_resultados.obtener(clave_resultados)
+        if traza is not None:
+            traza['cache_resultados'] = 'fallo' if posiciones is None else 'acierto'
+        if posiciones is not None:
+            return posiciones
+
+    # Buscar películas que coinciden con la descripción (posiciones por relevancia)
+    ranking = rankear_descripcion(descripcion, catalogo, traza)
+
+    # Conservar solo las que cumplen los filtros por rango (manteniendo la relevancia)
+    inicio = time.perf_counter()
+    mascara = mascara_por_rangos(catalogo, rangos)
+    posiciones = ranking if mascara is None else array('i', [p for p in ranking if mascara[p]])
+    marcar_etapa(traza, 'filtros', inicio)
+    if traza is not None:
+        traza['documentos_rankeados'] = len(ranking)
+    if clave_resultados is not None:
+        cache_resultados.guardar(clave_resultados, posiciones)
+    return posiciones
+
+def calcular_busqueda_descripcion(catalogo, descripcion, rangos, explicar=False, encolada=None,
+                                  corregir=True, desplazamiento=0, limite=LIMITE_PAGINA_DESCRIPCION,
+                                  campos=None):
+    """
+    Ejecuta la búsqueda por descripción y limpia para JSON una página de resultados
+    Parámetros:
+        catalogo - Catalogo sobre el que se busca
+        descripcion - Descripción o palabras clave que el usuario busca
+        rangos - Filtros por rango devueltos por parametros_rango
+        explicar - Si es True, la traza incluye el plan y los candidatos por término
+        encolada - Instante en que la petición pidió el cálculo (para medir la espera)
+        corregir - Si es True, se corrigen las palabras que no están en el catálogo
+        desplazamiento, limite - Página a serializar
+        campos - Columnas a incluir (None para todas)
+    Retorna: Tupla (página de filas JSON ordenada por relevancia, total de resultados, traza,
+             (consulta corregida, correcciones, clave de resultados))
+    """
+    traza = nueva_traza()
+    inicio = time.perf_counter()
+    if encolada is not None:
+        marcar_etapa(traza, 'espera', encolada)
+    try:
+        consulta, correcciones, clave_resultados = preparar_consulta(catalogo, descripcion, rangos, corregir, traza)
+        posiciones = posiciones_busqueda(catalogo, consulta, rangos, traza, clave_resultados)
+        
+        # Codificar solo las filas y columnas de la página, sin copiar el catálogo
+        inicio = time.perf_counter()
+        peliculas = filas_json(catalogo, posiciones[desplazamiento:desplazamiento + limite], campos)
+        inicio = marcar_etapa(traza, 'serializacion', inicio)
+
+        if explicar:
+            arbol, _ = normalizar_consulta(consulta, catalogo)
+            plan = plan_consulta(arbol, catalogo.textual) if arbol is not None else None
+            traza['plan'] = plan
+            traza['tokens'] = [hoja['texto'] for hoja in hojas_de_plan(plan)]
+            traza['candidatos_por_token'] = {hoja['texto']: hoja['candidatos'] for hoja in hojas_de_plan(plan)}
+            marcar_etapa(traza, 'plan', inicio)
+        return peliculas, len(posiciones), traza, (consulta, correcciones, clave_resultados)
+    except ErrorConsulta as e:
+        raise HTTPException(status_code=400, detail=f"Consulta no válida: {e}")
+    except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al buscar por descripción: {str(e)}")
 
-print("✅ Rutas de la API creadas exitosamente")
-print("✅ Ruta del chatbot (filtro por descripción) creada")
+# Resultados del primer evento (se envía en cuanto termina el ranking) y de los siguientes
+PRIMER_BLOQUE_SSE = 10
+BLOQUE_SSE = 50
+
+def evento_sse(evento, datos):
+    """
+    Formatea un evento Server-Sent Events con datos JSON (diccionario o bytes ya codificados)
+    Retorna: Bytes del evento listos para enviar
+    """
+    if not isinstance(datos, bytes):
+        datos = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+    return b"event: " + evento.encode('ascii') + b"\ndata: " + datos + b"\n\n"
+
+@app.get("/chatbot/stream")
+async def chatbot_stream(
+    descripcion: str,
+    limit: int = LIMITE_PAGINA_MAXIMO,
+    corregir: bool = True,
+    rangos: dict = Depends(parametros_rango),
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta del chatbot en streaming (Server-Sent Events): envía el total y los
+    primeros resultados en cuanto la búsqueda está rankeada, y el resto en bloques
+    Eventos: inicio {busqueda, total[, consulta_corregida, correcciones]}, peliculas {desde, peliculas}, fin {enviadas}
+    y fallo {detail} si la consulta no es válida o no tiene resultados
+    Ejemplo: /chatbot/stream?descripcion=action hero&minutos_max=100
+    """
+    cabeceras = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    limite = max(1, min(limit, LIMITE_PAGINA_MAXIMO))
+
+    # El ranking se comparte con la búsqueda paginada (misma caché de posiciones);
+    # la corrección y el análisis se hacen en el pool después de la admisión
+    if len(descripcion) > LARGO_MAXIMO_CONSULTA:
+        evento = evento_sse('fallo', {"detail": f"La consulta no puede superar {LARGO_MAXIMO_CONSULTA} caracteres"})
+        return Response(content=evento, media_type="text/event-stream", headers=cabeceras)
+    try:
+        posiciones, consulta, correcciones = await vuelos_busqueda.ejecutar(
+            ('posiciones', catalogo.id, catalogo.version, descripcion, corregir, tuple(rangos.values())),
+            lambda: controles_admision['descripcion'].ejecutar(
+                resolver_busqueda, catalogo, descripcion, rangos, corregir
+            )
+        )
+    except ErrorConsulta as e:
+        # EventSource no expone el cuerpo de un 400: el error viaja como evento
+        evento = evento_sse('fallo', {"detail": f"Consulta no válida: {e}"})
+        return Response(content=evento, media_type="text/event-stream", headers=cabeceras)
+
+    async def eventos():
+        total = len(posiciones)
+        inicio = {"busqueda": descripcion, "total": total}
+        if correcciones:
+            inicio.update(consulta_corregida=consulta, correcciones=correcciones)
+        yield evento_sse('inicio', inicio)
+        if not total:
+            yield evento_sse('fallo', {"detail": f"No se encontraron películas que coincidan con: {consulta}"})
+            return
+        enviadas = 0
+        tamano = PRIMER_BLOQUE_SSE
+        while enviadas < min(total, limite):
+            bloque = posiciones[enviadas:min(enviadas + tamano, limite)]
+            peliculas = await run_in_threadpool(filas_json, catalogo, bloque, campos)
+            yield evento_sse('peliculas', json_con_filas({"desde": enviadas}, peliculas))
+            enviadas += len(bloque)
+            tamano = BLOQUE_SSE
+        yield evento_sse('fin', {"enviadas": enviadas, "total": total})
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers=cabeceras)
+
+print("✅ Rutas de la API creadas exitosamente")
+print("✅ Ruta del chatbot (filtro por descripción) creada")
+
+# ========================================
+# ETAPA 8: ÍNDICE DE PERSONAS (REPARTO Y DIRECCIÓN)
+# ========================================
+
+# Columnas del dataset que contienen listas de personas separadas por comas
+COLUMNAS_PERSONAS = ('cast', 'director')
+
+def normalizar_nombre(nombre):
+    """
+    Normaliza un nombre para usarlo como clave del índice de personas
+    Parámetros: nombre - Nombre tal como aparece en el dataset o en la URL
+    Retorna: Nombre sin espacios repetidos y en minúsculas
+    """
+    return ' '.join(str(nombre).split()).casefold()
+
+def separar_nombres(valor):
+    """
+    Divide una celda de reparto o dirección en nombres individuales
+    Parámetros: valor - Cadena separada por comas (puede ser NaN)
+    Retorna: Lista de nombres sin espacios sobrantes
+    """
+    if not isinstance(valor, str):
+        return []
+    return [nombre.strip() for nombre in valor.split(',') if nombre.strip()]
+
+def construir_indice_personas(df, textos=None):
+    """
+    Normaliza las columnas cast y director en una tabla de personas con
+    listas de títulos (posiciones de fila) por persona y por rol
+    Parámetros:
+        df - DataFrame de Netflix
+        textos - Textos largos del catálogo compacto (opcional)
+    Retorna: Diccionario con la tabla de personas y las personas por título
+    """
+    personas = {}
+    por_titulo = {columna: [] for columna in COLUMNAS_PERSONAS}
+
+    for columna in COLUMNAS_PERSONAS:
+        valores = valores_columna(df, columna, textos)
+        for posicion, valor in enumerate(valores):
+            claves_titulo = []
+            for nombre in separar_nombres(valor):
+                # Claves internadas: la tabla y las listas por título comparten el mismo objeto
+                clave = sys.intern(normalizar_nombre(nombre))
+                persona = personas.get(clave)
+                if persona is None:
+                    persona = {'nombre': nombre, **{rol: [] for rol in COLUMNAS_PERSONAS}}
+                    personas[clave] = persona
+                # Un nombre repetido en la misma celda solo cuenta una vez
+                if not persona[columna] or persona[columna][-1] != posicion:
+                    persona[columna].append(posicion)
+                    claves_titulo.append(clave)
+            por_titulo[columna].append(claves_titulo)
+
+    # Compactar las listas de títulos en arreglos de enteros
+    for persona in personas.values():
+        for rol in COLUMNAS_PERSONAS:
+            persona[rol] = array('i', persona[rol])
+
+    return {'personas': personas, 'por_titulo': por_titulo}
+
+def buscar_persona(catalogo, nombre):
+    """
+    Obtiene una persona del índice o lanza un 404 si no existe
+    Parámetros:
+        catalogo - Catalogo en el que se busca
+        nombre - Nombre de la persona (no distingue mayúsculas)
+    Retorna: Tupla (clave, persona)
+    """
+    clave = normalizar_nombre(nombre)
+    persona = catalogo.personas['personas'].get(clave)
+    if persona is None:
+        raise HTTPException(status_code=404, detail=f"No se encontró la persona: {nombre}")
+    return clave, persona
+
+@app.get("/personas/{nombre}", response_class=JSONResponse)
+def persona_por_nombre(nombre: str, catalogo: Catalogo = Depends(obtener_catalogo)):
+    """
+    Ruta para obtener todos los títulos en los que participa una persona,
+    como parte del reparto o como director
+    Parámetros: nombre - Nombre de la persona (por ejemplo: "Kirsten Johnson")
+    """
+    _, persona = buscar_persona(catalogo, nombre)
+
+    try:
+        respuesta = {"nombre": persona['nombre']}
+        for rol in COLUMNAS_PERSONAS:
+            titulos = registros_catalogo(catalogo, persona[rol])
+            respuesta[rol] = {"total": len(titulos), "peliculas": titulos}
+        return JSONResponse(content=respuesta)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar persona: {str(e)}")
+
+@app.get("/personas/{nombre}/colaboradores", response_class=JSONResponse)
+def colaboradores_de_persona(
+    nombre: str,
+    rol: str = "cast",
+    limite: int = 50,
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener las personas que han coincidido con otra en algún título
+    (por ejemplo: actores que trabajaron con X)
+    Parámetros:
+        nombre - Nombre de la persona de referencia
+        rol - Rol de los colaboradores a devolver: "cast" o "director"
+        limite - Número máximo de colaboradores a devolver
+    """
+    if rol not in COLUMNAS_PERSONAS:
+        raise HTTPException(status_code=400, detail=f"Rol no válido: {rol}. Use 'cast' o 'director'")
+
+    clave, persona = buscar_persona(catalogo, nombre)
+
+    # Recorrer solo los títulos de la persona usando las listas del índice
+    posiciones = sorted(set(persona['cast']) | set(persona['director']))
+    personas_del_rol = catalogo.personas['por_titulo'][rol]
+    coincidencias = Counter(
+        otra for posicion in posiciones for otra in personas_del_rol[posicion] if otra != clave
+    )
+
+    colaboradores = [
+        {"nombre": catalogo.personas['personas'][otra]['nombre'], "titulos_en_comun": veces}
+        for otra, veces in coincidencias.most_common(max(limite, 0))
+    ]
+
+    return JSONResponse(content={
+        "nombre": persona['nombre'],
+        "rol": rol,
+        "total": len(coincidencias),
+        "colaboradores": colaboradores
+    })
+
+print("✅ Rutas de personas (reparto y dirección) creadas")
+
+# ========================================
+# ETAPA 9: ESTADÍSTICAS MATERIALIZADAS
+# ========================================
+
+# Dimensiones materializadas: nombre -> (columna, ¿la celda es una lista separada por comas?)
+DIMENSIONES_ESTADISTICAS = {
+    'anio': ('release_year', False),
+    'pais': ('country', True),
+    'genero': ('listed_in', True),
+    'clasificacion': ('rating', False),
+    'tipo': ('type', False),
+}
+
+# Cruces materializados entre dos dimensiones
+CRUCES_ESTADISTICAS = (
+    ('genero', 'anio'),
+    ('tipo', 'anio'),
+    ('pais', 'tipo'),
+    ('genero', 'clasificacion'),
+)
+
+def valores_dimension(fila, dimension):
+    """
+    Obtiene los valores de una fila para una dimensión de las estadísticas
+    Parámetros:
+        fila - Diccionario con las columnas de la película
+        dimension - Nombre de la dimensión (ver DIMENSIONES_ESTADISTICAS)
+    Retorna: Lista de valores (vacía si la celda no tiene dato)
+    """
+    columna, es_lista = DIMENSIONES_ESTADISTICAS[dimension]
+    valor = fila.get(columna)
+    if valor is None or pd.isna(valor):
+        return []
+    if es_lista:
+        return separar_nombres(valor)
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return [valor]
+
+def aplicar_filas(estadisticas, filas, signo):
+    """
+    Suma (signo=1) o resta (signo=-1) las contribuciones de unas filas a las
+    estadísticas materializadas
+    Parámetros:
+        estadisticas - Diccionario devuelto por construir_estadisticas
+        filas - Lista de diccionarios con las columnas de cada película
+        signo - 1 para agregar filas, -1 para quitarlas
+    """
+    for fila in filas:
+        valores = {dim: valores_dimension(fila, dim) for dim in DIMENSIONES_ESTADISTICAS}
+        for dim, lista in valores.items():
+            for valor in lista:
+                estadisticas['dimensiones'][dim][valor] += signo
+        for dim_a, dim_b in CRUCES_ESTADISTICAS:
+            cruce = estadisticas['cruces'][(dim_a, dim_b)]
+            for valor_a in valores[dim_a]:
+                for valor_b in valores[dim_b]:
+                    cruce[(valor_a, valor_b)] += signo
+        estadisticas['total'] += signo
+
+    # Quitar las claves que quedaron en cero tras restar filas
+    if signo < 0:
+        for contador in [*estadisticas['dimensiones'].values(), *estadisticas['cruces'].values()]:
+            for clave in [c for c, n in contador.items() if n <= 0]:
+                del contador[clave]
+
+def construir_estadisticas(df):
+    """
+    Materializa los conteos por dimensión y los cruces una sola vez
+    Parámetros: df - DataFrame de Netflix
+    Retorna: Diccionario con los contadores por dimensión y por cruce
+    """
+    estadisticas = {
+        'total': 0,
+        'dimensiones': {dim: Counter() for dim in DIMENSIONES_ESTADISTICAS},
+        'cruces': {cruce: Counter() for cruce in CRUCES_ESTADISTICAS},
+    }
+    aplicar_filas(estadisticas, df.to_dict(orient='records'), 1)
+    return estadisticas
+
+def actualizar_estadisticas(estadisticas, df_anterior, df_nuevo):
+    """
+    Actualiza las estadísticas con las diferencias entre dos snapshots
+    (filas agregadas, eliminadas o modificadas según su show_id)
+    Parámetros:
+        estadisticas - Estadísticas materializadas del snapshot anterior
+        df_anterior - DataFrame del snapshot anterior
+        df_nuevo - DataFrame recién cargado
+    Retorna: Nuevas estadísticas (las anteriores no se modifican)
+    """
+    columnas = sorted({col for col, _ in DIMENSIONES_ESTADISTICAS.values()})
+
+    def filas_por_id(df):
+        registros = df[['show_id', *columnas]].astype(object)
+        registros = registros.where(registros.notna(), None)
+        return {fila['show_id']: fila for fila in registros.to_dict(orient='records')}
+
+    anteriores = filas_por_id(df_anterior)
+    nuevas = filas_por_id(df_nuevo)
+    quitar = [fila for sid, fila in anteriores.items() if nuevas.get(sid) != fila]
+    agregar = [fila for sid, fila in nuevas.items() if anteriores.get(sid) != fila]
+
+    # Copiar los contadores para no alterar el snapshot que se está sirviendo
+    actualizadas = {
+        'total': estadisticas['total'],
+        'dimensiones': {dim: Counter(c) for dim, c in estadisticas['dimensiones'].items()},
+        'cruces': {cruce: Counter(c) for cruce, c in estadisticas['cruces'].items()},
+    }
+    aplicar_filas(actualizadas, quitar, -1)
+    aplicar_filas(actualizadas, agregar, 1)
+    print(f"🔄 Estadísticas actualizadas: {len(agregar)} filas nuevas o modificadas, {len(quitar)} retiradas")
+    return actualizadas
+
+def ordenar_conteos(contador, limite):
+    """
+    Ordena un contador de mayor a menor frecuencia
+    Parámetros:
+        contador - Counter con los conteos
+        limite - Número máximo de entradas (0 para todas)
+    Retorna: Lista de pares (valor, total)
+    """
+    return contador.most_common(limite if limite > 0 else None)
+
+@app.get("/estadisticas", response_class=JSONResponse)
+def resumen_estadisticas(catalogo: Catalogo = Depends(obtener_catalogo)):
+    """
+    Ruta para obtener un resumen del catálogo: total de títulos, valores
+    únicos por dimensión y los cruces disponibles
+    """
+    estadisticas = catalogo.estadisticas
+    return JSONResponse(content={
+        "catalogo": catalogo.id,
+        "version": catalogo.version,
+        "total": estadisticas['total'],
+        "valores_unicos": {dim: len(c) for dim, c in estadisticas['dimensiones'].items()},
+        "dimensiones": list(DIMENSIONES_ESTADISTICAS),
+        "cruces": [f"{a}/{b}" for a, b in CRUCES_ESTADISTICAS]
+    })
+
+@app.get("/estadisticas/cruce/{dimension_a}/{dimension_b}", response_class=JSONResponse)
+def estadisticas_cruce(
+    dimension_a: str,
+    dimension_b: str,
+    limite: int = 0,
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener un cruce materializado entre dos dimensiones
+    Parámetros:
+        dimension_a, dimension_b - Dimensiones del cruce (por ejemplo: genero/anio)
+        limite - Número máximo de combinaciones a devolver (0 para todas)
+    """
+    estadisticas = catalogo.estadisticas
+    cruce = estadisticas['cruces'].get((dimension_a, dimension_b))
+    if cruce is None:
+        disponibles = ", ".join(f"{a}/{b}" for a, b in CRUCES_ESTADISTICAS)
+        raise HTTPException(
+            status_code=404,
+            detail=f"Cruce no disponible: {dimension_a}/{dimension_b}. Disponibles: {disponibles}"
+        )
+
+    return JSONResponse(content={
+        "catalogo": catalogo.id,
+        "version": catalogo.version,
+        "cruce": [dimension_a, dimension_b],
+        "total": len(cruce),
+        "conteos": [
+            {dimension_a: a, dimension_b: b, "total": n}
+            for (a, b), n in ordenar_conteos(cruce, limite)
+        ]
+    })
+
+@app.get("/estadisticas/{dimension}", response_class=JSONResponse)
+def estadisticas_por_dimension(
+    dimension: str,
+    limite: int = 0,
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para obtener los conteos de títulos por una dimensión
+    Parámetros:
+        dimension - anio, pais, genero, clasificacion o tipo
+        limite - Número máximo de valores a devolver (0 para todos)
+    """
+    estadisticas = catalogo.estadisticas
+    contador = estadisticas['dimensiones'].get(dimension)
+    if contador is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Dimensión no disponible: {dimension}. Disponibles: {', '.join(DIMENSIONES_ESTADISTICAS)}"
+        )
+
+    return JSONResponse(content={
+        "catalogo": catalogo.id,
+        "version": catalogo.version,
+        "dimension": dimension,
+        "total": len(contador),
+        "conteos": [{"valor": valor, "total": n} for valor, n in ordenar_conteos(contador, limite)]
+    })
+
+@app.post("/admin/recargar", response_class=JSONResponse)
+async def recargar_catalogo(catalogo: str = CATALOGO_POR_DEFECTO):
+    """
+    Ruta para volver a leer un catálogo y publicar un nuevo snapshot; las
+    estadísticas se actualizan solo con las filas que cambiaron
+    Parámetros: catalogo - Identificador del catálogo a recargar
+    """
+    try:
+        nuevo = await run_in_threadpool(registro_catalogos.recargar, catalogo)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No existe el catálogo: {catalogo}")
+    except Exception:
+        raise HTTPException(status_code=500, detail="No se pudo recargar el dataset")
+
+    # Las búsquedas fijadas del snapshot anterior se descartaron: se fijan las del nuevo
+    if nuevo.id == CATALOGO_POR_DEFECTO:
+        rangos = await parametros_rango()
+        for consulta in consultas_pagina_inicial():
+            try:
+                await run_in_threadpool(precalentar_busqueda, nuevo, consulta, rangos)
+            except Exception as e:
+                print(f"⚠️ No se pudo precalentar la búsqueda '{consulta}': {e}")
+
+    return JSONResponse(content={
+        "catalogo": nuevo.id,
+        "version": nuevo.version,
+        "total": len(nuevo)
+    })
+
+print("✅ Rutas de estadísticas creadas")
+
+# ========================================
+# ETAPA 10: ÍNDICE INVERTIDO POSICIONAL Y CONSULTAS BOOLEANAS
+# ========================================
+
+# Prefijos de campo admitidos en las consultas -> columna del dataset
+CAMPOS_CONSULTA = {
+    'description': 'description',
+    'descripcion': 'description',
+    'title': 'title',
+    'titulo': 'title',
+    'genre': 'listed_in',
+    'genero': 'listed_in',
+    'cast': 'cast',
+    'reparto': 'cast',
+    'director': 'director',
+    'country': 'country',
+    'pais': 'country',
+}
+
+# Columnas indexadas (sin repetir) y campo por defecto de las palabras sin prefijo
+COLUMNAS_INDEXADAS = tuple(dict.fromkeys(CAMPOS_CONSULTA.values()))
+CAMPO_POR_DEFECTO = 'description'
+
+# Campos de texto libre que se indexan por lema (los nombres propios se dejan tal cual)
+CAMPOS_LEMATIZADOS = ('description', 'title', 'listed_in')
+
+# Operadores booleanos (solo en mayúsculas, para no confundirlos con palabras)
+OPERADORES_CONSULTA = ('AND', 'OR', 'NOT')
+
+# Piezas léxicas: paréntesis, prefijo de campo opcional y frase entre comillas o palabra
+PATRON_CONSULTA = re.compile(
+    r'\s*(?:(?P<parentesis>[()])|(?:(?P<campo>[A-Za-z]+):)?(?:"(?P<frase>[^"]*)"|(?P<palabra>[^\s()"]+)))'
+)
+
+# ========================================
+# TABLA DE LEMAS DEL VOCABULARIO
+# ========================================
+
+# Lematizador (stemmer Snowball: no necesita datos descargados de NLTK)
+lematizador = SnowballStemmer('english')
+
+# Tabla palabra -> lema persistida para no recalcular lemas al reiniciar
+RUTA_TABLA_LEMAS = Path(os.environ.get(
+    "RUTA_TABLA_LEMAS", Path(__file__).resolve().parent / 'DataSet' / 'lemas.json'
+))
+
+def cargar_tabla_lemas():
+    """
+    Lee la tabla palabra -> lema persistida
+    Retorna: Diccionario (vacío si el archivo no existe o no se puede leer)
+    """
+    try:
+        with open(RUTA_TABLA_LEMAS, encoding='utf-8') as archivo:
+            # Internar los lemas: muchas palabras comparten el mismo
+            return {palabra: sys.intern(lema) for palabra, lema in json.load(archivo).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ No se pudo leer la tabla de lemas: {e}")
+        return {}
+
+def guardar_tabla_lemas(lemas):
+    """
+    Persiste la tabla palabra -> lema (escritura atómica con un archivo temporal)
+    Parámetros: lemas - Diccionario palabra -> lema
+    """
+    try:
+        escribir_atomico(RUTA_TABLA_LEMAS, json.dumps(lemas, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar la tabla de lemas: {e}")
+
+# La tabla es compartida por todos los catálogos: leer, completar y escribir
+# se hace de a uno para que dos catálogos que cargan a la vez no se pisen
+candado_tabla_lemas = threading.Lock()
+
+def actualizar_tabla_lemas(vocabulario):
+    """
+    Completa la tabla persistida con los lemas de las palabras nuevas del vocabulario
+    Parámetros: vocabulario - Conjunto de palabras de un catálogo
+    Retorna: Diccionario palabra -> lema que incluye todo el vocabulario
+    """
+    with candado_tabla_lemas:
+        lemas = cargar_tabla_lemas()
+        nuevas = {palabra: sys.intern(lematizador.stem(palabra)) for palabra in vocabulario if palabra not in lemas}
+        if nuevas:
+            lemas = {**lemas, **nuevas}
+            guardar_tabla_lemas(lemas)
+    return lemas
+
+@lru_cache(maxsize=4096)
+def lema_fuera_de_vocabulario(palabra):
+    """
+    Calcula el lema de una palabra que no está en el vocabulario del catálogo
+    """
+    return lematizador.stem(palabra)
+
+def lema_de(palabra, lemas):
+    """
+    Obtiene el lema de una palabra (por ejemplo: killers -> killer, comedies -> comedi)
+    Parámetros:
+        palabra - Palabra ya limpia y en minúsculas
+        lemas - Tabla palabra -> lema del catálogo (textual['lemas'])
+    Retorna: Lema de la tabla o, si la palabra es nueva, calculado al vuelo
+    """
+    lema = lemas.get(palabra)
+    return lema if lema is not None else lema_fuera_de_vocabulario(palabra)
+
+@app.get("/admin/indice", response_class=JSONResponse)
+def reporte_indice(catalogo: Catalogo = Depends(obtener_catalogo)):
+    """
+    Ruta para consultar cuánto se reducen el vocabulario y las listas de
+    postings de cada campo al indexar por lema
+    """
+    campos = {}
+    for columna, datos in catalogo.textual['reporte'].items():
+        campos[columna] = {
+            **datos,
+            'reduccion_vocabulario': round(1 - datos['vocabulario_indexado'] / datos['vocabulario_original'], 4)
+                if datos['vocabulario_original'] else 0.0,
+            'reduccion_postings': round(1 - datos['postings_indexados'] / datos['postings_originales'], 4)
+                if datos['postings_originales'] else 0.0,
+        }
+    return JSONResponse(content={
+        "catalogo": catalogo.id,
+        "version": catalogo.version,
+        "tabla_lemas": {"entradas": len(catalogo.textual['lemas']), "ruta": str(RUTA_TABLA_LEMAS)},
+        "campos": campos
+    })
+
+class ErrorConsulta(ValueError):
+    """
+    Error de sintaxis en una consulta booleana (se responde con 400)
+    """
+
+class ListaPostings:
+    """
+    Lista de documentos (posiciones de fila, ordenadas) en los que aparece un
+    término, con las posiciones del término dentro de cada documento y
+    punteros de salto implícitos cada raíz cuadrada del largo de la lista.
+    Una vez construida se compacta en arreglos de enteros de 4 bytes
+    """
+    __slots__ = ('docs', 'posiciones', 'desplazamientos')
+
+    def __init__(self):
+        self.docs = []
+        self.posiciones = []
+        self.desplazamientos = [0]
+
+    def agregar(self, doc, posiciones):
+        self.docs.append(doc)
+        self.posiciones.extend(posiciones)
+        self.desplazamientos.append(len(self.posiciones))
+
+    def compactar(self):
+        self.docs = array('i', self.docs)
+        self.posiciones = array('i', self.posiciones)
+        self.desplazamientos = array('i', self.desplazamientos)
+
+    def posiciones_de(self, i):
+        """
+        Retorna: Posiciones del término dentro del i-ésimo documento de la lista
+        """
+        return self.posiciones[self.desplazamientos[i]:self.desplazamientos[i + 1]]
+
+    def __reduce__(self):
+        # Serialización posicional: evita guardar un diccionario de estado por lista
+        return (ListaPostings.desde_arreglos, (self.docs, self.posiciones, self.desplazamientos))
+
+    @staticmethod
+    def desde_arreglos(docs, posiciones, desplazamientos):
+        """
+        Reconstruye una lista ya compactada (usado al cargar artefactos)
+        """
+        lista = ListaPostings.__new__(ListaPostings)
+        lista.docs = docs
+        lista.posiciones = posiciones
+        lista.desplazamientos = desplazamientos
+        return lista
+
+def salto_de(lista):
+    """
+    Retorna: Distancia entre punteros de salto para una lista ordenada
+    """
+    return max(1, math.isqrt(len(lista)))
+
+def intersectar_con_saltos(a, b):
+    """
+    Intersecta dos listas ordenadas de documentos usando punteros de salto
+    Parámetros: a, b - Listas ordenadas de enteros
+    Retorna: Lista de pares (i, j) con a[i] == b[j]
+    """
+    salto_a, salto_b = salto_de(a), salto_de(b)
+    i = j = 0
+    pares = []
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            pares.append((i, j))
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            if i % salto_a == 0 and i + salto_a < len(a) and a[i + salto_a] <= b[j]:
+                while i % salto_a == 0 and i + salto_a < len(a) and a[i + salto_a] <= b[j]:
+                    i += salto_a
+            else:
+                i += 1
+        else:
+            if j % salto_b == 0 and j + salto_b < len(b) and b[j + salto_b] <= a[i]:
+                while j % salto_b == 0 and j + salto_b < len(b) and b[j + salto_b] <= a[i]:
+                    j += salto_b
+            else:
+                j += 1
+    return pares
+
+def tokenizar_con_posiciones(texto, lemas=None):
+    """
+    Tokeniza un texto conservando la posición de cada palabra útil
+    (las stopwords y la puntuación ocupan posición pero no se devuelven)
+    Parámetros:
+        texto - Texto a tokenizar
+        lemas - Tabla palabra -> lema para reducir cada palabra a su lema
+                (None para no lematizar; ver lema_de)
+    Retorna: Lista de pares (posicion, palabra)
+    """
+    if texto is None or pd.isna(texto):
+        return []
+    tokens = [
+        (posicion, palabra) for posicion, palabra in enumerate(tokenizar_texto(str(texto).lower()))
+        if palabra.isalnum() and palabra not in stop_words
+    ]
+    if lemas is not None:
+        return [(posicion, lema_de(palabra, lemas)) for posicion, palabra in tokens]
+    return tokens
+
+def construir_indice_textual(df, textos=None, tokens_por_columna=None):
+    """
+    Construye el índice invertido posicional de las columnas consultables.
+    En los campos de texto libre las palabras se indexan por su lema, usando
+    la tabla palabra -> lema del vocabulario del catálogo
+    Parámetros:
+        df - DataFrame de Netflix
+        textos - Textos largos del catálogo compacto (opcional)
+        tokens_por_columna - Tokens ya calculados por columna (opcional)
+    Retorna: Diccionario con los términos por columna, la tabla de lemas,
+             el reporte de reducción, el total de documentos y el
+             diccionario de corrección ortográfica
+    """
+    # Tokenizar una sola vez y completar la tabla de lemas con el vocabulario nuevo
+    if tokens_por_columna is None:
+        tokens_por_columna = {
+            columna: tokenizar_valores(valores_columna(df, columna, textos))
+            for columna in COLUMNAS_INDEXADAS
+        }
+    vocabulario = {
+        palabra
+        for columna in CAMPOS_LEMATIZADOS
+        for tokens in tokens_por_columna[columna]
+        for _, palabra in tokens
+    }
+    lemas = actualizar_tabla_lemas(vocabulario)
+
+    campos = {}
+    reporte = {}
+    for columna in COLUMNAS_INDEXADAS:
+        terminos = {}
+        vocabulario_original = set()
+        postings_originales = 0
+        # Las filas se recorren en orden, así que cada lista queda ordenada
+        for doc, tokens in enumerate(tokens_por_columna[columna]):
+            posiciones_doc = {}
+            originales_doc = set()
+            for posicion, palabra in tokens:
+                originales_doc.add(palabra)
+                if columna in CAMPOS_LEMATIZADOS:
+                    palabra = lemas[palabra]
+                posiciones_doc.setdefault(palabra, []).append(posicion)
+            vocabulario_original.update(originales_doc)
+            postings_originales += len(originales_doc)
+            for palabra, posiciones in posiciones_doc.items():
+                postings = terminos.get(palabra)
+                if postings is None:
+                    postings = terminos[palabra] = ListaPostings()
+                postings.agregar(doc, posiciones)
+        for postings in terminos.values():
+            postings.compactar()
+        campos[columna] = terminos
+        reporte[columna] = {
+            'lematizado': columna in CAMPOS_LEMATIZADOS,
+            'vocabulario_original': len(vocabulario_original),
+            'vocabulario_indexado': len(terminos),
+            'postings_originales': postings_originales,
+            'postings_indexados': sum(len(p.docs) for p in terminos.values()),
+        }
+    return {'campos': campos, 'lemas': lemas, 'reporte': reporte, 'total_documentos': len(df),
+            'correccion': construir_diccionario_correcciones(tokens_por_columna, lemas)}
+
+def nodo_compuesto(operador, hijos):
+    """
+    Crea un nodo 'y' u 'o' en forma canónica: sin hijos vacíos, aplanado,
+    sin repetidos y con los hijos ordenados (el orden de las palabras no cambia la clave)
+    """
+    planos = []
+    for hijo in hijos:
+        if hijo is None:
+            continue
+        planos.extend(hijo[1] if hijo[0] == operador else [hijo])
+    planos = sorted(set(planos), key=repr)
+    if not planos:
+        return None
+    if len(planos) == 1:
+        return planos[0]
+    return (operador, tuple(planos))
+
+def nodo_texto(campo, texto, es_frase, lemas):
+    """
+    Convierte una palabra o frase de la consulta en un nodo del árbol
+    Parámetros:
+        campo - Columna del dataset en la que se busca
+        texto - Texto de la palabra o frase
+        es_frase - True si venía entre comillas
+        lemas - Tabla palabra -> lema del catálogo consultado
+    """
+    tokens = tokenizar_con_posiciones(texto, lemas if campo in CAMPOS_LEMATIZADOS else None)
+    if not tokens:
+        return None
+    if es_frase and len(tokens) > 1:
+        inicio = tokens[0][0]
+        return ('frase', campo, tuple((posicion - inicio, palabra) for posicion, palabra in tokens))
+    # Una palabra que el tokenizador divide en varias se trata como OR (igual que antes)
+    return nodo_compuesto('o', [('termino', campo, palabra) for _, palabra in tokens])
+
+def lexico_consulta(consulta):
+    """
+    Divide la consulta en paréntesis, operadores y palabras o frases con su campo
+    Retorna: Lista de piezas ('(', ')', 'AND', 'OR', 'NOT' o ('texto', campo, texto, es_frase))
+    """
+    piezas = []
+    posicion = 0
+    consulta = consulta.strip()
+    while posicion < len(consulta):
+        coincidencia = PATRON_CONSULTA.match(consulta, posicion)
+        if coincidencia is None or coincidencia.end() == posicion:
+            raise ErrorConsulta(f"Comillas sin cerrar cerca de: {consulta[posicion:].strip()}")
+        posicion = coincidencia.end()
+        if coincidencia.group('parentesis'):
+            piezas.append(coincidencia.group('parentesis'))
+            continue
+        campo = coincidencia.group('campo')
+        frase, palabra = coincidencia.group('frase'), coincidencia.group('palabra')
+        if campo is None and palabra in OPERADORES_CONSULTA:
+            piezas.append(palabra)
+        elif campo is not None and campo.lower() not in CAMPOS_CONSULTA:
+            # Prefijo desconocido: se busca como texto normal
+            piezas.append(('texto', CAMPO_POR_DEFECTO, f"{campo} {frase if frase is not None else palabra}", frase is not None))
+        else:
+            columna = CAMPOS_CONSULTA[campo.lower()] if campo else CAMPO_POR_DEFECTO
+            piezas.append(('texto', columna, frase if frase is not None else palabra, frase is not None))
+    return piezas
+
+def analizar_consulta(consulta, lemas):
+    """
+    Analiza una consulta con AND, OR, NOT, frases entre comillas y prefijos de
+    campo (genre:, cast:, title:, director:, country:). Las palabras sin
+    operador se combinan con OR, y "a NOT b" equivale a "a AND NOT b"
+    Parámetros:
+        consulta - Texto de la consulta
+        lemas - Tabla palabra -> lema del catálogo consultado
+    Retorna: Árbol canónico de la consulta (None si no queda ninguna palabra útil)
+    """
+    piezas = lexico_consulta(consulta)
+    posicion = 0
+
+    def actual():
+        return piezas[posicion] if posicion < len(piezas) else None
+
+    def analizar_o():
+        nonlocal posicion
+        hijos = [analizar_y()]
+        while actual() is not None and actual() != ')':
+            if actual() == 'OR':
+                posicion += 1
+            hijos.append(analizar_y())
+        return nodo_compuesto('o', hijos)
+
+    def analizar_y():
+        nonlocal posicion
+        hijos = [analizar_unario()]
+        while actual() in ('AND', 'NOT'):
+            if actual() == 'AND':
+                posicion += 1
+            hijos.append(analizar_unario())
+        return nodo_compuesto('y', hijos)
+
+    def analizar_unario():
+        nonlocal posicion
+        pieza = actual()
+        if pieza == 'NOT':
+            posicion += 1
+            negado = analizar_unario()
+            return None if negado is None else ('no', negado)
+        if pieza == '(':
+            posicion += 1
+            nodo = analizar_o()
+            if actual() != ')':
+                raise ErrorConsulta("Falta cerrar un paréntesis")
+            posicion += 1
+            return nodo
+        if isinstance(pieza, tuple):
+            posicion += 1
+            return nodo_texto(*pieza[1:], lemas)
+        raise ErrorConsulta(f"Se esperaba una palabra y se encontró: {pieza or 'fin de la consulta'}")
+
+    arbol = analizar_o()
+    if posicion < len(piezas):
+        raise ErrorConsulta("Paréntesis de cierre sin abrir")
+    return arbol
+
+def docs_de_frase(indice, campo, frase):
+    """
+    Obtiene los documentos donde aparece la frase con las palabras en posiciones consecutivas
+    (respetando los huecos que dejan las stopwords)
+    """
+    terminos = indice['campos'][campo]
+    postings = [terminos.get(palabra) for _, palabra in frase]
+    if any(p is None for p in postings):
+        return []
+
+    # Documentos candidatos con sus posiciones de inicio de frase posibles
+    docs = postings[0].docs
+    inicios = [set(postings[0].posiciones_de(i)) for i in range(len(docs))]
+    for (desplazamiento, _), siguiente in zip(frase[1:], postings[1:]):
+        pares = intersectar_con_saltos(docs, siguiente.docs)
+        docs_nuevos, inicios_nuevos = [], []
+        for i, j in pares:
+            validos = inicios[i].intersection(p - desplazamiento for p in siguiente.posiciones_de(j))
+            if validos:
+                docs_nuevos.append(docs[i])
+                inicios_nuevos.append(validos)
+        docs, inicios = docs_nuevos, inicios_nuevos
+    return docs
+
+def evaluar_consulta(nodo, indice):
+    """
+    Evalúa el árbol de la consulta sobre el índice invertido
+    Retorna: Lista ordenada de documentos (posiciones de fila)
+    """
+    tipo = nodo[0]
+    if tipo == 'termino':
+        postings = indice['campos'][nodo[1]].get(nodo[2])
+        return postings.docs if postings is not None else []
+    if tipo == 'frase':
+        return docs_de_frase(indice, nodo[1], nodo[2])
+    if tipo == 'no':
+        excluidos = set(evaluar_consulta(nodo[1], indice))
+        return [doc for doc in range(indice['total_documentos']) if doc not in excluidos]
+    if tipo == 'o':
+        union = set()
+        for hijo in nodo[1]:
+            union.update(evaluar_consulta(hijo, indice))
+        return sorted(union)
+
+    # 'y': intersectar primero las listas positivas más cortas y luego restar las negadas
+    positivos = sorted(
+        (evaluar_consulta(h, indice) for h in nodo[1] if h[0] != 'no'), key=len
+    )
+    negados = [h[1] for h in nodo[1] if h[0] == 'no']
+    if positivos:
+        resultado = positivos[0]
+        for lista in positivos[1:]:
+            if not resultado:
+                break
+            resultado = [resultado[i] for i, _ in intersectar_con_saltos(resultado, lista)]
+    else:
+        resultado = list(range(indice['total_documentos']))
+    for negado in negados:
+        excluidos = set(evaluar_consulta(negado, indice))
+        resultado = [doc for doc in resultado if doc not in excluidos]
+    return resultado
+
+def hojas_positivas(nodo):
+    """
+    Retorna: Lista de términos y frases que no están bajo un NOT (sirven para la relevancia)
+    """
+    if nodo[0] in ('termino', 'frase'):
+        return [nodo]
+    if nodo[0] == 'no':
+        return []
+    return [hoja for hijo in nodo[1] for hoja in hojas_positivas(hijo)]
+
+def etiqueta_hoja(hoja):
+    """
+    Retorna: Texto legible de un término o frase (por ejemplo: genre:comedies o "serial killer")
+    """
+    texto = hoja[2] if hoja[0] == 'termino' else '"' + ' '.join(p for _, p in hoja[2]) + '"'
+    return texto if hoja[1] == CAMPO_POR_DEFECTO else f"{hoja[1]}:{texto}"
+
+def plan_consulta(nodo, indice):
+    """
+    Describe el árbol de la consulta con los documentos candidatos de cada término o frase
+    Retorna: Diccionario anidado (tipo, hijos) con hojas (tipo, campo, texto, candidatos)
+    """
+    tipo = nodo[0]
+    if tipo in ('termino', 'frase'):
+        return {'tipo': tipo, 'campo': nodo[1], 'texto': etiqueta_hoja(nodo),
+                'candidatos': len(evaluar_consulta(nodo, indice))}
+    if tipo == 'no':
+        return {'tipo': 'no', 'hijos': [plan_consulta(nodo[1], indice)]}
+    return {'tipo': tipo, 'hijos': [plan_consulta(hijo, indice) for hijo in nodo[1]]}
+
+def hojas_de_plan(plan):
+    """
+    Retorna: Lista de términos y frases del plan (incluidos los negados)
+    """
+    if plan is None:
+        return []
+    if 'hijos' not in plan:
+        return [plan]
+    return [hoja for hijo in plan['hijos'] for hoja in hojas_de_plan(hijo)]
+
+def rankear_consulta(arbol, indice, dataset, traza=None):
+    """
+    Evalúa la consulta y ordena los documentos por el número de términos
+    positivos que contienen (a igualdad, en el orden del dataset)
+    Parámetros:
+        arbol - Árbol devuelto por analizar_consulta
+        indice - Índice devuelto por construir_indice_textual
+        dataset - DataFrame sobre el que se construyó el índice
+        traza - Traza donde anotar etapas y documentos puntuados (opcional)
+    Retorna: Lista de diccionarios (indice, posicion, coincidencias, palabras_clave) ordenada por relevancia
+    """
+    inicio = time.perf_counter()
+    resultado = evaluar_consulta(arbol, indice)
+    inicio = marcar_etapa(traza, 'evaluacion', inicio)
+    if traza is not None:
+        traza['documentos_puntuados'] = len(resultado)
+    if not resultado:
+        return []
+
+    en_resultado = set(resultado)
+    palabras_por_doc = {doc: [] for doc in resultado}
+    for hoja in dict.fromkeys(hojas_positivas(arbol)):
+        etiqueta = etiqueta_hoja(hoja)
+        for doc in evaluar_consulta(hoja, indice):
+            if doc in en_resultado:
+                palabras_por_doc[doc].append(etiqueta)
+
+    orden = sorted(resultado, key=lambda doc: -len(palabras_por_doc[doc]))
+    marcar_etapa(traza, 'puntuacion', inicio)
+    etiquetas = dataset.index
+    return [
+        {
+            'indice': etiquetas[doc],
+            'posicion': doc,
+            'coincidencias': len(palabras_por_doc[doc]),
+            'palabras_clave': palabras_por_doc[doc],
+        }
+        for doc in orden
+    ]
+
+def normalizar_consulta(descripcion, catalogo):
+    """
+    Analiza la consulta del usuario y obtiene su clave canónica para cachés
+    Parámetros:
+        descripcion - Texto de la búsqueda
+        catalogo - Catalogo consultado (sus palabras se lematizan con la tabla de ese snapshot)
+    Retorna: Tupla (árbol, clave)
+    """
+    arbol = analizar_consulta(descripcion, catalogo.textual['lemas'])
+    return arbol, repr(arbol)
+
+# ========================================
+# CORRECCIÓN ORTOGRÁFICA DE CONSULTAS (BORRADO SIMÉTRICO)
+# ========================================
+
+# Distancia máxima de edición corregida y largo del prefijo con el que se generan los borrados
+DISTANCIA_MAXIMA_CORRECCION = 2
+PREFIJO_CORRECCION = 7
+
+# Las palabras más cortas no se corrigen (hay demasiadas palabras válidas a una edición)
+LARGO_MINIMO_CORRECCION = 3
+
+# Largo máximo de una consulta y palabras desconocidas que se buscan en el
+# diccionario por consulta (las siguientes se dejan tal cual)
+LARGO_MAXIMO_CONSULTA = 500
+MAXIMO_PALABRAS_CORREGIDAS = 8
+
+# Palabras de la consulta que se intentan corregir (las que llevan dígitos se dejan tal cual)
+PATRON_PALABRA = re.compile(r"\w+")
+
+def borrados_de(palabra, distancia_maxima):
+    """
+    Genera las variantes de una palabra con hasta distancia_maxima letras borradas
+    Retorna: Conjunto de variantes (incluida la palabra)
+    """
+    variantes = {palabra}
+    nivel = {palabra}
+    for _ in range(distancia_maxima):
+        nivel = {v[:i] + v[i + 1:] for v in nivel if len(v) > 1 for i in range(len(v))} - variantes
+        variantes |= nivel
+    return variantes
+
+def distancia_edicion(a, b, maxima):
+    """
+    Distancia de Damerau-Levenshtein restringida (inserción, borrado,
+    sustitución y transposición de letras vecinas)
+    Retorna: Distancia, o maxima + 1 si la supera
+    """
+    if abs(len(a) - len(b)) > maxima:
+        return maxima + 1
+    # El prefijo y el sufijo comunes no cambian la distancia: solo se compara el resto
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(a) - inicio and fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    a, b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+    fuera = maxima + 1
+    if not a or not b:
+        return min(len(a) + len(b), fuera)
+
+    # Solo se calculan las celdas a distancia <= maxima de la diagonal
+    anterior2 = None
+    anterior = [j if j <= maxima else fuera for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        desde, hasta = max(1, i - maxima), min(len(b), i + maxima)
+        actual = [fuera] * (len(b) + 1)
+        if i <= maxima:
+            actual[0] = i
+        letra_a = a[i - 1]
+        for j in range(desde, hasta + 1):
+            letra_b = b[j - 1]
+            valor = anterior[j - 1] + (letra_a != letra_b)
+            if anterior[j] + 1 < valor:
+                valor = anterior[j] + 1
+            if actual[j - 1] + 1 < valor:
+                valor = actual[j - 1] + 1
+            if i > 1 and j > 1 and letra_a == b[j - 2] and a[i - 2] == letra_b and anterior2[j - 2] + 1 < valor:
+                valor = anterior2[j - 2] + 1
+            actual[j] = valor
+        if min(actual[desde - 1:hasta + 1]) > maxima:
+            return fuera
+        anterior2, anterior = anterior, actual
+    return min(anterior[-1], fuera)
+
+class DiccionarioCorrecciones:
+    """
+    Diccionario de corrección por borrado simétrico (estilo SymSpell): se
+    precalculan los borrados del prefijo de cada palabra del vocabulario, así
+    que corregir solo genera los borrados de la palabra consultada, los busca
+    en el diccionario y verifica la distancia de los pocos candidatos
+    """
+    __slots__ = ('frecuencias', 'borrados', 'distancia_maxima', 'prefijo')
+
+    def __init__(self, frecuencias, distancia_maxima=DISTANCIA_MAXIMA_CORRECCION, prefijo=PREFIJO_CORRECCION):
+        self.frecuencias = frecuencias
+        self.distancia_maxima = distancia_maxima
+        self.prefijo = prefijo
+        # Borrado -> palabra, o tupla de palabras si lo comparten varias (la mayoría tiene una)
+        borrados = {}
+        for palabra in frecuencias:
+            for variante in borrados_de(palabra[:prefijo], distancia_maxima):
+                actual = borrados.get(variante)
+                if actual is None:
+                    borrados[variante] = palabra
+                elif isinstance(actual, tuple):
+                    borrados[variante] = actual + (palabra,)
+                else:
+                    borrados[variante] = (actual, palabra)
+        self.borrados = borrados
+
+    def __len__(self):
+        return len(self.frecuencias)
+
+    def __reduce__(self):
+        # Los borrados se guardan en el artefacto: recalcularlos es lo caro
+        return (DiccionarioCorrecciones.desde_partes,
+                (self.frecuencias, self.borrados, self.distancia_maxima, self.prefijo))
+
+    @staticmethod
+    def desde_partes(frecuencias, borrados, distancia_maxima, prefijo):
+        """
+        Reconstruye un diccionario ya calculado (usado al cargar artefactos)
+        """
+        diccionario = DiccionarioCorrecciones.__new__(DiccionarioCorrecciones)
+        diccionario.frecuencias = frecuencias
+        diccionario.borrados = borrados
+        diccionario.distancia_maxima = distancia_maxima
+        diccionario.prefijo = prefijo
+        return diccionario
+
+    def sugerir(self, palabra):
+        """
+        Busca la palabra del vocabulario más cercana (a igual distancia, la más frecuente)
+        Parámetros: palabra - Palabra en minúsculas
+        Retorna: Tupla (palabra, distancia, frecuencia de su lema), o None si no hay ninguna a distancia permitida
+        """
+        if palabra in self.frecuencias:
+            return palabra, 0, self.frecuencias[palabra]
+        if len(palabra) < LARGO_MINIMO_CORRECCION:
+            return None
+        mejor = None
+        # En palabras cortas dos ediciones cambian casi toda la palabra: se permite solo una
+        maxima = 1 if len(palabra) <= 4 else self.distancia_maxima
+        vistos = set()
+        # Con una sola edición permitida bastan los borrados de un carácter
+        for variante in borrados_de(palabra[:self.prefijo], maxima):
+            candidatos = self.borrados.get(variante)
+            if candidatos is None:
+                continue
+            for candidato in (candidatos if isinstance(candidatos, tuple) else (candidatos,)):
+                if candidato in vistos:
+                    continue
+                vistos.add(candidato)
+                # Con un candidato ya encontrado solo interesan los que estén igual o más cerca
+                distancia = distancia_edicion(palabra, candidato, maxima)
+                if distancia > maxima:
+                    continue
+                clave = (distancia, -self.frecuencias[candidato], candidato)
+                if mejor is None or clave < mejor:
+                    mejor = clave
+                    maxima = distancia
+        if mejor is None:
+            return None
+        return mejor[2], mejor[0], -mejor[1]
+
+def construir_diccionario_correcciones(tokens_por_columna, lemas):
+    """
+    Cuenta las palabras de los campos de texto libre y precalcula sus borrados.
+    La frecuencia de cada palabra es la de su lema (mystery cuenta también
+    mysteries), porque el índice busca por lema: así, entre dos candidatos a
+    la misma distancia gana el que más coincidencias va a dar
+    Parámetros:
+        tokens_por_columna - Tokens por columna (ver construir_indice_textual)
+        lemas - Tabla palabra -> lema del vocabulario
+    Retorna: DiccionarioCorrecciones
+    """
+    frecuencias = Counter(
+        palabra
+        for columna in CAMPOS_LEMATIZADOS
+        for tokens in tokens_por_columna[columna]
+        for _, palabra in tokens
+        if palabra.isalpha()
+    )
+    por_lema = Counter()
+    for palabra, veces in frecuencias.items():
+        por_lema[lemas[palabra]] += veces
+    return DiccionarioCorrecciones({sys.intern(p): por_lema[lemas[p]] for p in frecuencias})
+
+def corregir_consulta(descripcion, catalogo):
+    """
+    Corrige las palabras de la consulta que no existen en el vocabulario del
+    catálogo (solo en los campos de texto libre; los operadores, prefijos y
+    nombres de personas o países se dejan como están)
+    Parámetros:
+        descripcion - Texto de la búsqueda
+        catalogo - Catalogo cuyo vocabulario se usa
+    Retorna: Tupla (consulta corregida, lista de correcciones aplicadas)
+    """
+    diccionario = catalogo.textual.get('correccion')
+    if not diccionario:
+        return descripcion, []
+    correcciones = []
+    intentos = 0
+
+    def corregir_palabra(coincidencia, columna):
+        nonlocal intentos
+        original = coincidencia.group(0)
+        palabra = original.lower()
+        # Las palabras conocidas (o cuyo lema está indexado) no se tocan
+        if (not palabra.isalpha() or palabra in stop_words or palabra in diccionario.frecuencias
+                or lema_de(palabra, catalogo.textual['lemas']) in catalogo.textual['campos'][columna]):
+            return original
+        intentos += 1
+        if intentos > MAXIMO_PALABRAS_CORREGIDAS:
+            return original
+        sugerencia = diccionario.sugerir(palabra)
+        if sugerencia is None:
+            return original
+        correcciones.append({"original": original, "sugerencia": sugerencia[0],
+                             "distancia": sugerencia[1], "frecuencia": sugerencia[2]})
+        return sugerencia[0]
+
+    partes = []
+    posicion = 0
+    for coincidencia in PATRON_CONSULTA.finditer(descripcion):
+        grupo = 'frase' if coincidencia.group('frase') is not None else 'palabra'
+        if coincidencia.group(grupo) is None:
+            continue
+        campo = coincidencia.group('campo')
+        if campo is None and coincidencia.group('palabra') in OPERADORES_CONSULTA:
+            continue
+        columna = CAMPOS_CONSULTA.get(campo.lower(), CAMPO_POR_DEFECTO) if campo else CAMPO_POR_DEFECTO
+        if columna not in CAMPOS_LEMATIZADOS:
+            continue
+        inicio, fin = coincidencia.span(grupo)
+        partes.append(descripcion[posicion:inicio])
+        partes.append(PATRON_PALABRA.sub(lambda c: corregir_palabra(c, columna), descripcion[inicio:fin]))
+        posicion = fin
+    partes.append(descripcion[posicion:])
+    return ''.join(partes), correcciones
+
+print("✅ Índice invertido posicional y consultas booleanas configurados")
+
+# ========================================
+# ETAPA 11: CONSTRUCCIÓN OFFLINE DE ARTEFACTOS (build-index)
+# ========================================
+
+# Versión del formato de los artefactos: cambia cuando cambian las estructuras de los índices
+FORMATO_ARTEFACTOS = 3
+
+# Carpeta donde build-index deja los artefactos y de donde el servidor los carga
+DIRECTORIO_ARTEFACTOS = Path(os.environ.get(
+    "DIRECTORIO_ARTEFACTOS", Path(__file__).resolve().parent / 'artifacts'
+))
+
+# Artefactos que se conservan por catálogo (el vigente y los anteriores más recientes)
+ARTEFACTOS_CONSERVADOS = 2
+
+def huella_archivo(ruta):
+    """
+    Calcula el SHA-256 de un archivo leyéndolo por bloques
+    Retorna: Huella en hexadecimal
+    """
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+def escribir_atomico(ruta, datos):
+    """
+    Escribe bytes en un archivo temporal y lo renombra, para que un servidor
+    nunca lea un archivo a medio escribir. El temporal es propio de cada
+    proceso e hilo: dos escrituras simultáneas no se pisan
+    """
+    temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporal, 'wb') as archivo:
+            archivo.write(datos)
+        os.replace(temporal, ruta)
+    finally:
+        temporal.unlink(missing_ok=True)
+
+def leer_manifiesto(directorio):
+    """
+    Lee el manifiesto de los artefactos de un catálogo
+    Retorna: Diccionario, o None si no existe o no se puede leer
+    """
+    try:
+        with open(Path(directorio) / 'manifiesto.json', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ No se pudo leer el manifiesto de {directorio}: {e}")
+        return None
+
+class SerializadorArtefactos(pickle.Pickler):
+    """
+    Pickler de los artefactos: guarda los array('i') como bytes crudos, que
+    se reconstruyen con una sola llamada a array(tipo, bytes) al cargar
+    """
+
+    def reducer_override(self, objeto):
+        if type(objeto) is array:
+            return array, (objeto.typecode, objeto.tobytes())
+        return NotImplemented
+
+def serializar_artefacto(carga):
+    """
+    Retorna: Bytes del artefacto serializado con SerializadorArtefactos
+    """
+    salida = io.BytesIO()
+    SerializadorArtefactos(salida, pickle.HIGHEST_PROTOCOL).dump(carga)
+    return salida.getvalue()
+
+def deserializar_artefacto(datos):
+    """
+    Reconstruye la carga de un artefacto. El recolector de basura se pausa
+    mientras tanto: son cientos de miles de contenedores recién creados que
+    dispararían colecciones sin nada que liberar
+    """
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(datos)
+    finally:
+        if activo:
+            gc.enable()
+
+def construir_artefactos(entrada, salida, catalogo_id, procesos):
+    """
+    Ejecuta todo el preprocesamiento de un catálogo (lectura, compactación,
+    tokenización, índices y estadísticas) y escribe un artefacto versionado
+    con su manifiesto y sus huellas
+    Parámetros:
+        entrada - Ruta del CSV
+        salida - Carpeta de artefactos (se crea una subcarpeta por catálogo)
+        catalogo_id - Identificador del catálogo
+        procesos - Número de procesos para construir los índices
+    Retorna: Manifiesto escrito
+    """
+    inicio = time.perf_counter()
+    tiempos = {}
+    df, tiempos['lectura'] = cronometrar(cargar_dataset, entrada)
+    if df is None:
+        raise RuntimeError(f"No se pudo leer el CSV: {entrada}")
+    (df, textos), tiempos['compactacion'] = cronometrar(compactar_dataset, df)
+
+    if procesos > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            indices, tiempos_indices = construir_indices(df, textos, ejecutor=ejecutor, procesos=procesos)
+    else:
+        indices, tiempos_indices = construir_indices(df, textos)
+    tiempos.update(tiempos_indices)
+    memoria = Catalogo(catalogo_id, entrada, 0, df, textos, **indices).bytes
+
+    datos, tiempos['serializacion'] = cronometrar(serializar_artefacto, {'df': df, 'textos': textos, **indices})
+    huella = hashlib.sha256(datos).hexdigest()
+
+    directorio = Path(salida) / catalogo_id
+    directorio.mkdir(parents=True, exist_ok=True)
+    version = (leer_manifiesto(directorio) or {}).get('version', 0) + 1
+    nombre = f"indice-v{version}-{huella[:12]}.pkl"
+    escribir_atomico(directorio / nombre, datos)
+    tiempos['total'] = time.perf_counter() - inicio
+
+    manifiesto = {
+        "formato": FORMATO_ARTEFACTOS,
+        "catalogo": catalogo_id,
+        "version": version,
+        "construido": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "procesos": procesos,
+        "registros": len(df),
+        "memoria_bytes": memoria,
+        "entrada": {"ruta": str(entrada), "sha256": huella_archivo(entrada)},
+        "archivo": {"nombre": nombre, "sha256": huella, "bytes": len(datos)},
+        "tiempos_segundos": {etapa: round(segundos, 4) for etapa, segundos in tiempos.items()},
+        "entorno": {"python": sys.version.split()[0], "pandas": pd.__version__, "numpy": np.__version__},
+    }
+    # El manifiesto se escribe al final: publica el artefacto de forma atómica
+    escribir_atomico(directorio / 'manifiesto.json',
+                     json.dumps(manifiesto, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    anteriores = sorted(directorio.glob('indice-v*.pkl'), key=lambda r: r.stat().st_mtime, reverse=True)
+    for ruta in anteriores[ARTEFACTOS_CONSERVADOS:]:
+        ruta.unlink(missing_ok=True)
+    return manifiesto
+
+def cargar_artefacto(id, ruta, version):
+    """
+    Carga un catálogo desde sus artefactos si existen, son del formato actual,
+    se construyeron a partir del mismo CSV y la huella del archivo coincide
+    Parámetros:
+        id, ruta - Identificador y CSV del catálogo
+        version - Versión del snapshot a publicar
+    Retorna: Catalogo, o None si hay que construir los índices a partir del CSV
+    """
+    directorio = DIRECTORIO_ARTEFACTOS / id
+    manifiesto = leer_manifiesto(directorio)
+    if manifiesto is None:
+        print(f"⚠️ No hay artefactos para '{id}': los índices se construyen al cargar "
+              f"(ejecute: python -m herramientas build-index --catalogo {id})")
+        return None
+    if manifiesto.get('formato') != FORMATO_ARTEFACTOS:
+        print(f"⚠️ Los artefactos de '{id}' tienen otro formato; vuelva a ejecutar build-index")
+        return None
+
+    try:
+        if huella_archivo(ruta) != manifiesto['entrada']['sha256']:
+            print(f"⚠️ Los artefactos de '{id}' no corresponden al CSV actual; vuelva a ejecutar build-index")
+            return None
+        inicio = time.perf_counter()
+        datos = (directorio / manifiesto['archivo']['nombre']).read_bytes()
+        if hashlib.sha256(datos).hexdigest() != manifiesto['archivo']['sha256']:
+            print(f"⚠️ La huella del artefacto de '{id}' no coincide; se ignora")
+            return None
+        carga = deserializar_artefacto(datos)
+    except Exception as e:
+        print(f"⚠️ No se pudieron cargar los artefactos de '{id}': {e}")
+        return None
+
+    catalogo = Catalogo(id, ruta, version, origen=f"artefacto v{manifiesto['version']}",
+                        bytes=manifiesto.get('memoria_bytes'), **carga)
+    print(f"✅ Artefacto v{manifiesto['version']} de '{id}' cargado en {time.perf_counter() - inicio:.2f} s")
+    return catalogo
+
+# ========================================
+# ETAPA 12: EXPORTACIÓN MASIVA EN STREAMING (NDJSON, ARROW Y PARQUET)
+# ========================================
+
+# Filas por bloque enviado (NDJSON) o por lote/grupo de filas (Arrow y Parquet)
+FILAS_POR_BLOQUE_EXPORTACION = 1000
+
+# Formatos de exportación -> (tipo de contenido, extensión del archivo)
+FORMATOS_EXPORTACION = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Columnas que se exportan como enteros en los formatos columnares (el resto como texto)
+COLUMNAS_ENTERAS_EXPORTACION = ('release_year',)
+
+class SalidaPorBloques:
+    """
+    Archivo de solo escritura para pyarrow que guarda lo escrito hasta que se
+    vacía: cada lote se envía al cliente y se descarta. La posición sigue
+    contando todo lo escrito, porque Parquet la usa para su índice final
+    """
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+        self.closed = False
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self.partes.append(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vaciar(self):
+        """
+        Retorna: Bytes escritos desde el último vaciado
+        """
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+def mascara_faceta(catalogo, dimension, valor):
+    """
+    Filas cuyo valor en una dimensión de las estadísticas coincide exactamente
+    (en país y género, basta con que sea uno de los valores de la lista)
+    Parámetros:
+        catalogo - Catalogo a filtrar
+        dimension - Dimensión de DIMENSIONES_ESTADISTICAS
+        valor - Valor buscado
+    Retorna: Arreglo booleano por posición de fila
+    """
+    columna, es_lista = DIMENSIONES_ESTADISTICAS[dimension]
+    serie = catalogo.df[columna]
+    if not es_lista:
+        return (serie == valor).to_numpy(dtype=bool, na_value=False)
+    # Se evalúa una vez por categoría distinta y no una vez por fila
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        coincide = np.array([valor in separar_nombres(c) for c in serie.cat.categories] + [False], dtype=bool)
+        return coincide[serie.cat.codes.to_numpy()]
+    return np.array([valor in separar_nombres(v) for v in serie.tolist()], dtype=bool)
+
+def posiciones_exportacion(catalogo, categoria, facetas, rangos):
+    """
+    Combina los filtros de la exportación
+    Parámetros:
+        catalogo - Catalogo a exportar
+        categoria - Texto contenido en listed_in, como en /peliculas/categoria (opcional)
+        facetas - Diccionario dimensión -> valor exacto (los None se ignoran)
+        rangos - Filtros por rango devueltos por parametros_rango
+    Retorna: Arreglo de posiciones, o None para exportar todo el catálogo
+    """
+    mascaras = [mascara_faceta(catalogo, dimension, valor)
+                for dimension, valor in facetas.items() if valor is not None]
+    if categoria:
+        mascaras.append(catalogo.df['listed_in'].str.contains(categoria, case=False, na=False).to_numpy())
+    mascara = mascara_por_rangos(catalogo, rangos)
+    if mascara is not None:
+        mascaras.append(mascara)
+    if not mascaras:
+        return None
+    return np.flatnonzero(np.logical_and.reduce(mascaras))
+
+def bloques_exportacion(catalogo, posiciones):
+    """
+    Divide las filas a exportar en bloques de FILAS_POR_BLOQUE_EXPORTACION
+    Retorna: Generador de posiciones (rangos o arreglos)
+    """
+    total = len(catalogo) if posiciones is None else len(posiciones)
+    for inicio in range(0, total, FILAS_POR_BLOQUE_EXPORTACION):
+        fin = min(inicio + FILAS_POR_BLOQUE_EXPORTACION, total)
+        yield range(inicio, fin) if posiciones is None else posiciones[inicio:fin]
+
+def exportar_ndjson(catalogo, posiciones, columnas):
+    """
+    Genera el NDJSON por bloques: un objeto JSON por línea. Cada bloque se
+    codifica directamente; los fragmentos precodificados no se usan porque
+    una exportación completa los dejaría en memoria para todas las columnas
+    """
+    for bloque in bloques_exportacion(catalogo, posiciones):
+        yield ''.join(
+            json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for registro in registros_catalogo(catalogo, bloque, columnas)
+        ).encode('utf-8')
+
+def lote_arrow(pa, catalogo, bloque, esquema):
+    """
+    Convierte un bloque de filas del catálogo compacto en un RecordBatch de Arrow
+    (los valores nulos quedan como nulos, no como cadenas vacías)
+    """
+    bloque = list(bloque)
+    vista = catalogo.df.iloc[bloque]
+    arreglos = []
+    for campo in esquema:
+        if campo.name in catalogo.textos:
+            texto = catalogo.textos[campo.name]
+            valores = [texto[p] for p in bloque]
+        else:
+            valores = vista[campo.name].tolist()
+        if campo.name in COLUMNAS_ENTERAS_EXPORTACION:
+            valores = [None if v is None or v != v else int(v) for v in valores]
+        arreglos.append(pa.array(valores, type=campo.type, from_pandas=True))
+    return pa.RecordBatch.from_arrays(arreglos, schema=esquema)
+
+def exportar_columnar(catalogo, posiciones, columnas, formato):
+    """
+    Genera un stream IPC de Arrow o un archivo Parquet lote a lote: cada bloque
+    se convierte, se escribe y se envía antes de leer el siguiente
+    """
+    import pyarrow as pa
+
+    esquema = pa.schema([
+        (columna, pa.int64() if columna in COLUMNAS_ENTERAS_EXPORTACION else pa.string())
+        for columna in columnas
+    ])
+    salida = SalidaPorBloques()
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        escritor = pq.ParquetWriter(salida, esquema)
+    else:
+        escritor = pa.ipc.new_stream(salida, esquema)
+    with escritor:
+        for bloque in bloques_exportacion(catalogo, posiciones):
+            escritor.write_batch(lote_arrow(pa, catalogo, bloque, esquema))
+            yield salida.vaciar()
+    # Al cerrar se escribe el fin del stream o el pie del Parquet
+    yield salida.vaciar()
+
+@app.get("/exportar")
+def exportar_catalogo(
+    formato: str = 'ndjson',
+    categoria: Optional[str] = None,
+    tipo: Optional[str] = None,
+    clasificacion: Optional[str] = None,
+    pais: Optional[str] = None,
+    genero: Optional[str] = None,
+    anio: Optional[int] = None,
+    rangos: dict = Depends(parametros_rango),
+    campos: Optional[tuple] = Depends(parametros_campos),
+    catalogo: Catalogo = Depends(obtener_catalogo),
+):
+    """
+    Ruta para descargar el catálogo limpio completo en streaming, por bloques
+    de tamaño fijo: la memoria usada no depende del tamaño del catálogo
+    Formatos: ndjson (por defecto), arrow (stream IPC) y parquet (requieren pyarrow)
+    Filtros opcionales: categoria (como /peliculas/categoria), las facetas
+    exactas tipo, clasificacion, pais, genero y anio, los filtros por rango y fields=
+    Ejemplo: /exportar?formato=ndjson&tipo=Movie&pais=Mexico
+    Ejemplo: /exportar?formato=parquet&genero=Dramas&fields=show_id,title,release_year
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato no válido: {formato}. Disponibles: {', '.join(FORMATOS_EXPORTACION)}"
+        )
+    if formato != 'ndjson':
+        try:
+            import pyarrow
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"El formato {formato} requiere pyarrow, que no está instalado")
+
+    try:
+        facetas = {'tipo': tipo, 'clasificacion': clasificacion, 'pais': pais, 'genero': genero, 'anio': anio}
+        posiciones = posiciones_exportacion(catalogo, categoria, facetas, rangos)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al preparar la exportación: {str(e)}")
+    columnas = list(campos or catalogo.columnas)
+    total = len(catalogo) if posiciones is None else len(posiciones)
+
+    # El generador conserva este snapshot aunque el catálogo se recargue durante la descarga
+    tipo_contenido, extension = FORMATOS_EXPORTACION[formato]
+    contenido = (exportar_ndjson(catalogo, posiciones, columnas) if formato == 'ndjson'
+                 else exportar_columnar(catalogo, posiciones, columnas, formato))
+    return StreamingResponse(contenido, media_type=tipo_contenido, headers={
+        "Content-Disposition": f'attachment; filename="{catalogo.id}-v{catalogo.version}.{extension}"',
+        "X-Total-Registros": str(total),
+    })
@@ -0,0 +1,246 @@
+function enviarMensaje(event) {
+    event.preventDefault();
+    const input = document.getElementById('userInput');
+    const busqueda = input.value.trim();
+
+    if (!busqueda) {
+        alert('Por favor, escribe algo para buscar');
+        return;
+    }
+
+    // Mostrar carga
+    mostrarCarga();
+
+    // Recibir los resultados por streaming en cuanto el servidor los rankea
+    if (window.EventSource) {
+        buscarEnStreaming(busqueda);
+    } else {
+        buscarSinStreaming(busqueda);
+    }
+
+    // Limpiar el input
+    input.value = '';
+
+    // Scroll a los resultados
+    document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
+}
+
+let fuenteActual = null;
+
+function buscarEnStreaming(busqueda) {
+    // Una búsqueda nueva cancela el stream de la anterior
+    if (fuenteActual) {
+        fuenteActual.close();
+    }
+    const fuente = new EventSource(`/chatbot/stream?descripcion=${encodeURIComponent(busqueda)}`);
+    fuenteActual = fuente;
+    // Indica si llegó algún evento del servidor (inicio, fin o fallo)
+    let respondio = false;
+
+    fuente.addEventListener('inicio', event => {
+        respondio = true;
+        const datos = JSON.parse(event.data);
+        if (datos.total > 0) {
+            iniciarResultados(datos.total, datos.consulta_corregida);
+        }
+    });
+    fuente.addEventListener('peliculas', event => {
+        agregarResultados(JSON.parse(event.data).peliculas);
+    });
+    fuente.addEventListener('fin', () => {
+        respondio = true;
+        fuente.close();
+    });
+    fuente.addEventListener('fallo', event => {
+        respondio = true;
+        fuente.close();
+        mostrarError(JSON.parse(event.data).detail);
+    });
+    fuente.onerror = () => {
+        // Error de conexión o respuesta 429/503/404/500 (por ejemplo, el servidor
+        // rechazó la búsqueda por carga): el navegador ya dejó la conexión en
+        // CLOSED, así que no se mira readyState. Se cierra siempre para que no
+        // reintente, y si no llegó ningún evento se quita el aviso de carga
+        fuente.close();
+        if (!respondio) {
+            mostrarError('No se pudo completar la búsqueda, intenta de nuevo');
+        }
+    };
+}
+
+function buscarSinStreaming(busqueda) {
+    fetch(`/peliculas/descripcion/${encodeURIComponent(busqueda)}`)
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(err => {
+                    throw new Error(err.detail || 'Error en la búsqueda');
+                });
+            }
+            return response.json();
+        })
+        .then(data => {
+            mostrarResultados(busqueda, data.peliculas, data.total, data.consulta_corregida);
+        })
+        .catch(error => {
+            mostrarError(error.message);
+        });
+}
+
+function agregarMensajeUsuario(mensaje) {
+    // Ya no usamos mensajes de usuario en el nuevo diseño
+}
+
+function mostrarCarga() {
+    const results = document.getElementById('results');
+    results.innerHTML = '<div class="loading">🔍 Buscando películas...</div>';
+}
+
+function mostrarResultados(busqueda, peliculas, total, consultaCorregida) {
+    const results = document.getElementById('results');
+
+    if (peliculas.length === 0) {
+        results.innerHTML = '<div class="error">No se encontraron películas con esa descripción</div>';
+        return;
+    }
+
+    iniciarResultados(total, consultaCorregida);
+    agregarResultados(peliculas);
+}
+
+function iniciarResultados(total, consultaCorregida) {
+    const results = document.getElementById('results');
+    peliculasActuales = [];
+    // Si el servidor corrigió alguna palabra, se muestra la búsqueda que realmente se hizo
+    const titulo = consultaCorregida
+        ? `Resultados para "${consultaCorregida}" (${total} encontradas)`
+        : `Resultados de tu búsqueda (${total} encontradas)`;
+    results.innerHTML = `<div class="content-section"><h2 class="section-title">${titulo}</h2><div class="content-row"><div class="items-container" id="itemsContainer"></div></div></div>`;
+
+    // Scroll a los resultados
+    results.scrollIntoView({ behavior: 'smooth' });
+}
+
+function agregarResultados(peliculas) {
+    // Los bloques llegan en orden de relevancia: se agregan al final de la lista
+    let html = '';
+    peliculas.forEach(pelicula => {
+        const index = peliculasActuales.length;
+        peliculasActuales.push(pelicula);
+        const emoji = pelicula.type === 'Movie' ? '🎬' : '📺';
+        const tipoTexto = pelicula.type === 'Movie' ? 'Película' : (pelicula.type === 'TV Show' ? 'Serie' : pelicula.type || 'N/A');
+        html += `
+            <div class="movie-item" onclick="verDetalle(${index})">
+                <div class="movie-item-cover">${emoji}</div>
+                <div class="movie-item-info">
+                    <div class="movie-item-title">${pelicula.title || 'Sin título'}</div>
+                    <div class="movie-item-meta">${tipoTexto} • ${pelicula.rating || 'N/A'} • ${pelicula.release_year || 'N/A'}</div>
+                </div>
+            </div>
+        `;
+    });
+    document.getElementById('itemsContainer').insertAdjacentHTML('beforeend', html);
+}
+
+function buscar(keywords) {
+    const input = document.getElementById('userInput');
+    input.value = keywords;
+    enviarMensaje(new Event('submit'));
+}
+
+function empezarBusqueda() {
+    const input = document.getElementById('userInput');
+    input.focus();
+    scrollToCategorias();
+}
+
+function scrollToCategorias() {
+    document.getElementById('categoriasSection').scrollIntoView({ behavior: 'smooth' });
+}
+
+function mostrarError(mensaje) {
+    const results = document.getElementById('results');
+    results.innerHTML = `<div class="error">❌ Error: ${mensaje}</div>`;
+}
+
+let peliculasActuales = [];
+
+function verDetalle(index) {
+    const pelicula = peliculasActuales[index];
+
+    const modal = document.createElement('div');
+    modal.className = 'modal';
+    modal.innerHTML = `
+        <div class="modal-content">
+            <div class="modal-header">
+                <span class="close" onclick="cerrarModal()">&times;</span>
+                <h2>${pelicula.title || 'Sin título'}</h2>
+            </div>
+            <div class="modal-body">
+                <div class="modal-synopsis">
+                    <h3>📖 Sinopsis</h3>
+                    <p>${pelicula.description || 'Sin descripción disponible'}</p>
+                </div>
+                <div class="modal-info-grid">
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">🎭 Tipo</div>
+                        <div class="modal-info-value">${pelicula.type === 'Movie' ? 'Película' : (pelicula.type === 'TV Show' ? 'Serie de TV' : pelicula.type || 'N/A')}</div>
+                    </div>
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">⭐ Clasificación</div>
+                        <div class="modal-info-value">${pelicula.rating || 'N/A'}</div>
+                    </div>
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">📅 Año</div>
+                        <div class="modal-info-value">${pelicula.release_year || 'N/A'}</div>
+                    </div>
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">⏱️ Duración</div>
+                        <div class="modal-info-value">${pelicula.duration || 'N/A'}</div>
+                    </div>
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">🌍 País</div>
+                        <div class="modal-info-value">${pelicula.country || 'N/A'}</div>
+                    </div>
+                    <div class="modal-info-item">
+                        <div class="modal-info-label">🎬 Director</div>
+                        <div class="modal-info-value">${pelicula.director || 'N/A'}</div>
+                    </div>
+                </div>
+                ${pelicula.cast ? `
+                <div class="modal-info-item" style="grid-column: 1 / -1;">
+                    <div class="modal-info-label">👥 Reparto</div>
+                    <div class="modal-info-value">${pelicula.cast}</div>
+                </div>
+                ` : ''}
+                ${pelicula.listed_in ? `
+                <div class="modal-info-item" style="grid-column: 1 / -1;">
+                    <div class="modal-info-label">🏷️ Categorías</div>
+                    <div class="modal-info-value">${pelicula.listed_in}</div>
+                </div>
+                ` : ''}
+            </div>
+            <div class="modal-footer">
+                <button onclick="cerrarModal()" style="width: 100%;">Cerrar</button>
+            </div>
+        </div>
+    `;
+
+    document.body.appendChild(modal);
+    modal.style.display = 'block';
+}
+
+function cerrarModal() {
+    const modal = document.querySelector('.modal');
+    if (modal) {
+        modal.style.display = 'none';
+        modal.remove();
+    }
+}
+
+// Cerrar modal al hacer clic fuera de él
+window.onclick = function(event) {
+    const modal = document.querySelector('.modal');
+    if (event.target == modal) {
+        cerrarModal();
+    }
+}
@@ -0,0 +1,34 @@
+"""
+Configuración compartida de las pruebas: permite importar main desde la raíz
+del repositorio y construye un índice textual pequeño sin tocar DataSet/
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+
+
+@pytest.fixture(scope="module")
+def indice_textual(tmp_path_factory):
+    """
+    Índice textual de tres películas (la tabla de lemas se escribe en un directorio temporal)
+    """
+    ruta_original = main.RUTA_TABLA_LEMAS
+    main.RUTA_TABLA_LEMAS = tmp_path_factory.mktemp("lemas") / "lemas.json"
+    df = pd.DataFrame({
+        'title': ['Red Dog', 'Blue Cat', 'Dog Days'],
+        'description': ['a killer dog hunts the city', 'the cat and the dog sleep', 'serial killer in the city'],
+        'listed_in': ['Comedies', 'Dramas', 'Comedies, Thrillers'],
+        'cast': ['Ann Lee', 'Bob Ray', 'Ann Lee'],
+        'director': ['X', 'Y', 'Z'],
+        'country': ['Chile', 'Peru', 'Chile'],
+    })
+    try:
+        yield main.construir_indice_textual(df)
+    finally:
+        main.RUTA_TABLA_LEMAS = ruta_original
@@ -0,0 +1,152 @@
+"""
+Pruebas del control de admisión: rechazo con 429 y 503 y devolución del cupo
+cuando una petición en espera se cancela
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+async def ocupar(control, liberar):
+    """
+    Ocupa un cupo del control hasta que se active el evento liberar
+    """
+    async with control:
+        await liberar.wait()
+
+
+async def esperar_turno(control):
+    """
+    Entra al control y sale de inmediato
+    """
+    async with control:
+        return True
+
+
+def test_cola_llena_responde_429():
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=1, espera_maxima=5)
+        liberar = asyncio.Event()
+        ocupante = asyncio.create_task(ocupar(control, liberar))
+        await asyncio.sleep(0)
+        en_cola = asyncio.create_task(esperar_turno(control))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as rechazo:
+            await esperar_turno(control)
+        assert rechazo.value.status_code == 429
+        assert int(rechazo.value.headers["Retry-After"]) >= 1
+        assert control.rechazadas_cola_llena == 1
+
+        # Al terminar la primera, la encolada recibe el cupo
+        liberar.set()
+        assert await en_cola is True
+        await ocupante
+        assert control.en_curso == 0
+        assert not control.cola
+
+    asyncio.run(escenario())
+
+
+def test_espera_estimada_mayor_al_plazo_responde_503():
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=8, espera_maxima=1)
+        control.tiempo_servicio = 10.0
+        liberar = asyncio.Event()
+        ocupante = asyncio.create_task(ocupar(control, liberar))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as rechazo:
+            await esperar_turno(control)
+        assert rechazo.value.status_code == 503
+        assert control.rechazadas_por_plazo == 1
+        assert not control.cola
+
+        liberar.set()
+        await ocupante
+        assert control.en_curso == 0
+
+    asyncio.run(escenario())
+
+
+def test_plazo_vencido_en_cola_responde_503_sin_ocupar_cupo():
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=8, espera_maxima=0.05)
+        control.tiempo_servicio = 0.001
+        liberar = asyncio.Event()
+        ocupante = asyncio.create_task(ocupar(control, liberar))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as rechazo:
+            await esperar_turno(control)
+        assert rechazo.value.status_code == 503
+        assert not control.cola
+        assert control.en_curso == 1
+
+        liberar.set()
+        await ocupante
+        assert control.en_curso == 0
+
+    asyncio.run(escenario())
+
+
+def test_cancelar_en_cola_no_pierde_el_cupo():
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=8, espera_maxima=5)
+        liberar = asyncio.Event()
+        ocupante = asyncio.create_task(ocupar(control, liberar))
+        await asyncio.sleep(0)
+        en_cola = asyncio.create_task(esperar_turno(control))
+        await asyncio.sleep(0)
+        assert len(control.cola) == 1
+
+        en_cola.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await en_cola
+        assert not control.cola
+
+        liberar.set()
+        await ocupante
+        assert control.en_curso == 0
+
+    asyncio.run(escenario())
+
+
+def test_cancelar_con_el_cupo_ya_cedido_lo_devuelve():
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=8, espera_maxima=5)
+        await control.__aenter__()
+        en_cola = asyncio.create_task(esperar_turno(control))
+        await asyncio.sleep(0)
+
+        # La primera cede su cupo y la encolada se cancela antes de retomar
+        await control.__aexit__(None, None, None)
+        en_cola.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await en_cola
+        assert control.en_curso == 0
+        assert not control.cola
+
+        # El cupo quedó libre: la siguiente entra sin esperar
+        assert await esperar_turno(control) is True
+        assert control.encoladas == 1
+
+    asyncio.run(escenario())
+
+
+def test_ejecutar_libera_el_cupo_aunque_la_funcion_falle():
+    def fallar():
+        raise RuntimeError("fallo")
+
+    async def escenario():
+        control = main.ControlAdmision('prueba', max_en_curso=1, max_en_cola=0, espera_maxima=1)
+        assert await control.ejecutar(sum, [1, 2, 3]) == 6
+        with pytest.raises(RuntimeError):
+            await control.ejecutar(fallar)
+        assert control.en_curso == 0
+        assert control.admitidas == 2
+
+    asyncio.run(escenario())
@@ -0,0 +1,108 @@
+"""
+Pruebas del lenguaje de consultas: léxico, análisis (NOT, frases, prefijos de
+campo y errores de paréntesis), intersección con saltos y búsqueda de frases
+"""
+import random
+
+import pytest
+
+import main
+
+
+def test_lexico_separa_operadores_frases_y_campos():
+    piezas = main.lexico_consulta('genre:comedies "serial killer" NOT (dog OR cat)')
+    assert piezas == [
+        ('texto', 'listed_in', 'comedies', False),
+        ('texto', 'description', 'serial killer', True),
+        'NOT', '(',
+        ('texto', 'description', 'dog', False),
+        'OR',
+        ('texto', 'description', 'cat', False),
+        ')',
+    ]
+
+
+def test_lexico_rechaza_comillas_sin_cerrar():
+    with pytest.raises(main.ErrorConsulta):
+        main.lexico_consulta('dog "serial killer')
+
+
+@pytest.mark.parametrize("consulta", ['(dog', 'dog)', '(dog OR cat))', 'dog AND', '()'])
+def test_parentesis_y_operadores_incompletos_son_error(indice_textual, consulta):
+    with pytest.raises(main.ErrorConsulta):
+        main.analizar_consulta(consulta, indice_textual['lemas'])
+
+
+def test_palabras_sin_operador_se_combinan_con_or(indice_textual):
+    arbol = main.analizar_consulta('dog cat', indice_textual['lemas'])
+    assert arbol[0] == 'o'
+    assert list(main.evaluar_consulta(arbol, indice_textual)) == [0, 1]
+
+
+def test_el_orden_no_cambia_la_clave_canonica(indice_textual):
+    lemas = indice_textual['lemas']
+    assert repr(main.analizar_consulta('dog cat', lemas)) == repr(main.analizar_consulta('cat   dog', lemas))
+
+
+def test_not_binario_equivale_a_and_not(indice_textual):
+    lemas = indice_textual['lemas']
+    arbol = main.analizar_consulta('killer NOT genre:dramas', lemas)
+    assert arbol == main.analizar_consulta('killer AND NOT genre:dramas', lemas)
+    assert list(main.evaluar_consulta(arbol, indice_textual)) == [0, 2]
+
+
+def test_not_solo_excluye_del_catalogo_completo(indice_textual):
+    arbol = main.analizar_consulta('NOT dog', indice_textual['lemas'])
+    assert list(main.evaluar_consulta(arbol, indice_textual)) == [2]
+
+
+def test_prefijo_de_campo_busca_en_esa_columna(indice_textual):
+    lemas = indice_textual['lemas']
+    assert list(main.evaluar_consulta(main.analizar_consulta('title:dog', lemas), indice_textual)) == [0, 2]
+    assert list(main.evaluar_consulta(main.analizar_consulta('genre:comedies', lemas), indice_textual)) == [0, 2]
+
+
+def test_parentesis_agrupan(indice_textual):
+    arbol = main.analizar_consulta('(dog OR cat) AND city', indice_textual['lemas'])
+    assert list(main.evaluar_consulta(arbol, indice_textual)) == [0]
+
+
+def test_frase_exige_palabras_consecutivas_y_en_orden(indice_textual):
+    lemas = indice_textual['lemas']
+    frase = main.analizar_consulta('"serial killer"', lemas)
+    assert frase[0] == 'frase'
+    assert main.docs_de_frase(indice_textual, 'description', frase[2]) == [2]
+
+    invertida = main.analizar_consulta('"killer serial"', lemas)
+    assert main.docs_de_frase(indice_textual, 'description', invertida[2]) == []
+
+    separadas = main.analizar_consulta('"killer city"', lemas)
+    assert main.docs_de_frase(indice_textual, 'description', separadas[2]) == []
+
+
+def test_frase_con_palabra_desconocida_no_tiene_resultados(indice_textual):
+    frase = main.analizar_consulta('"killer zebra"', indice_textual['lemas'])
+    assert main.docs_de_frase(indice_textual, 'description', frase[2]) == []
+
+
+def intersectar_simple(a, b):
+    """
+    Intersección de referencia, sin punteros de salto
+    """
+    posicion_en_b = {doc: j for j, doc in enumerate(b)}
+    return [(i, posicion_en_b[doc]) for i, doc in enumerate(a) if doc in posicion_en_b]
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_interseccion_con_saltos_coincide_con_la_simple(semilla):
+    azar = random.Random(semilla)
+    universo = azar.choice([10, 100, 5000])
+    a = sorted(azar.sample(range(universo), azar.randint(0, min(universo, 400))))
+    b = sorted(azar.sample(range(universo), azar.randint(0, min(universo, 40))))
+    assert main.intersectar_con_saltos(a, b) == intersectar_simple(a, b)
+    assert main.intersectar_con_saltos(b, a) == intersectar_simple(b, a)
+
+
+def test_interseccion_con_listas_vacias():
+    assert main.intersectar_con_saltos([], [1, 2, 3]) == []
+    assert main.intersectar_con_saltos([1, 2, 3], []) == []
@@ -0,0 +1,69 @@
+"""
+Pruebas de la corrección ortográfica: distancia de edición acotada y sugerencias
+"""
+import random
+
+import pytest
+
+import main
+
+
+def distancia_referencia(a, b):
+    """
+    Distancia de Damerau-Levenshtein restringida calculada con la tabla completa
+    """
+    d = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        d[i][0] = i
+    for j in range(len(b) + 1):
+        d[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+@pytest.mark.parametrize("a, b, distancia", [
+    ("mystery", "mystery", 0),
+    ("mistery", "mystery", 1),
+    ("detectve", "detective", 1),
+    ("actoin", "action", 1),
+    ("hero", "ehro", 1),
+    ("love", "", 4),
+    ("ca", "abc", 3),
+])
+def test_distancia_de_casos_conocidos(a, b, distancia):
+    assert main.distancia_edicion(a, b, 5) == distancia
+
+
+def test_distancia_que_supera_la_maxima_se_acota():
+    assert main.distancia_edicion("kitten", "sitting", 2) == 3
+    assert main.distancia_edicion("a", "abcdef", 2) == 3
+
+
+def test_distancia_coincide_con_la_tabla_completa():
+    azar = random.Random(7)
+    for _ in range(3000):
+        a = ''.join(azar.choice('abcd') for _ in range(azar.randint(0, 8)))
+        b = ''.join(azar.choice('abcd') for _ in range(azar.randint(0, 8)))
+        maxima = azar.randint(0, 3)
+        referencia = distancia_referencia(a, b)
+        assert main.distancia_edicion(a, b, maxima) == min(referencia, maxima + 1), (a, b, maxima)
+
+
+def test_sugerir_elige_la_mas_cercana_y_luego_la_mas_frecuente():
+    diccionario = main.DiccionarioCorrecciones({'mystery': 50, 'master': 80, 'history': 10})
+    assert diccionario.sugerir('mistery') == ('mystery', 1, 50)
+    assert diccionario.sugerir('mystery') == ('mystery', 0, 50)
+    assert diccionario.sugerir('zzzzzz') is None
+
+
+def test_palabras_cortas_admiten_una_sola_edicion():
+    diccionario = main.DiccionarioCorrecciones({'love': 5, 'war': 3})
+    assert diccionario.sugerir('lvoe') == ('love', 1, 5)
+    assert diccionario.sugerir('wra') == ('war', 1, 3)
+    assert diccionario.sugerir('lxyz') is None
+    assert diccionario.sugerir('lo') is None